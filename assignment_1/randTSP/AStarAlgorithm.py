@@ -1,10 +1,12 @@
-from datetime import datetime
+from functools import lru_cache
 from typing import List, Optional, Tuple
 import heapq
-import sys
 from string import ascii_uppercase
 
+import numpy as np
+
 from GraphInterface import GraphInterface
+from ExpansionProfiler import ExpansionProfiler
 
 
 class AStarAlgorithm(object):
@@ -12,13 +14,43 @@ class AStarAlgorithm(object):
 
     """
 
-    def __init__(self, graph: GraphInterface):
+    def __init__(self, graph: GraphInterface, closed_set: bool=False,
+                 heuristic: str="nearest", mst_cache_size: int=2**16,
+                 upper_bound: bool=False, profile: bool=False):
+        """
+
+        Args:
+            graph: The problem to search over.
+            closed_set: If True, keep the best backward cost found for each (visited
+                cities, last city) state and prune paths dominated by it.
+            heuristic: The name of the heuristic to use, a key of HEURISTICS.
+            mst_cache_size: The number of minimum spanning tree costs (one per set of
+                visited cities) to keep cached for the "mst" heuristic.
+            upper_bound: If True, first construct a tour (nearest neighbour and 2-opt)
+                and never push paths whose score is at least its cost.
+            profile: If True, run records per-phase timings and frontier and
+                branching histograms in profiler.
+        """
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(f"Unknown heuristic {heuristic}, must be one of {list(self.HEURISTICS)}.")
+
         self.graph = graph
+        self.closed_set = closed_set
+        self.heuristic_name = heuristic
+        # None when profiling is off, so run calls the untimed phases.
+        self.profiler = ExpansionProfiler() if profile else None
+        self.mst_cost = lru_cache(maxsize=mst_cache_size)(self.compute_mst_cost)
+        self.incumbent, self.bound = graph.constructive_tour() if upper_bound else (None, np.inf)
         graph.reset()
         self.reset()
 
     def reset(self):
         self.nodes_traversed=0
+        self.nodes_pruned = 0
+        self.stale_skipped = 0
+        self.bound_pruned = 0
+        self.peak_frontier = 0
+        self.best_cost = {}
         self.path_queue = []
 
         heapq.heappush(self.path_queue, (0 + self.heuristic([0]), [0]))
@@ -34,9 +66,78 @@ class AStarAlgorithm(object):
         """
         return len(path) > self.graph.problem_size()
 
-    def run(self, max_traversed=10000000) -> Tuple[int, Optional[List[str]], float]:
+    def is_dominated(self, visited: int, last: int, cost: float) -> bool:
+        """ Checks a path against the closed set, recording it if it is the cheapest
+            path found so far to its state.
+
+        Args:
+            visited: A bitmask of the cities visited by the path.
+            last: The city the path ends at.
+            cost: The backward cost of the path.
+
+        Returns:
+            True if a path at least as cheap has already been found to the same state
+            (and so this path should not be pushed), False otherwise.
+        """
+        if not self.closed_set:
+            return False
+
+        key = (visited, last)
+        if self.best_cost.get(key, float("inf")) <= cost:
+            self.nodes_pruned += 1
+            return True
+
+        self.best_cost[key] = cost
+        return False
+
+    def exceeds_bound(self, value: float) -> bool:
+        """ Checks a path's score against the cost of the constructed tour, counting the
+            paths pruned.
+
+        Args:
+            value: The path's backward cost plus heuristic.
+
+        Returns:
+            True if the path cannot lead to a cheaper tour than the constructed one.
+        """
+        if value >= self.bound:
+            self.bound_pruned += 1
+            return True
+        return False
+
+    def incumbent_result(self) -> Tuple[int, List[str], float]:
+        """ Returns the constructed tour as the result of a search, once every other
+            path has been pruned by its cost (proving it optimal).
+        """
+        return (self.nodes_traversed, self.to_letters(self.incumbent), self.bound)
+
+    def is_stale(self, visited: int, last: int, cost: float) -> bool:
+        """ Checks whether a popped path has since been beaten by a cheaper path to
+            the same state, in which case it does not need to be expanded.
+
+        Args:
+            visited: A bitmask of the cities visited by the path.
+            last: The city the path ends at.
+            cost: The backward cost of the path.
+        """
+        if self.closed_set and self.best_cost.get((visited, last), cost) < cost:
+            self.stale_skipped += 1
+            return True
+        return False
+
+    def successor_costs(self, path: List[int], successors: np.ndarray) -> np.ndarray:
+        """ Returns the backward costs of extending a path to each of its successors.
+        """
+        return self.graph.backward_cost(path) + self.graph.dist_matrix[path[-1], successors]
+
+    def run(self, max_traversed=10000000) -> Tuple[int, Optional[List[str]], Optional[float]]:
         """ Runs the A* search
 
+        When profiling, each phase of node expansion is timed and the frontier and
+        branching are recorded in profiler. The phases are called through local names,
+        bound to the timed functions only when profiling, so an unprofiled search pays
+        nothing for it.
+
         Args:
             max_traversed: The number of nodes to traverse before stopping.
 
@@ -44,44 +145,72 @@ class AStarAlgorithm(object):
             Returns a tuple containing the number of nodes expanded, the solution
             path and the overall cost of the solution. If the algorithm successfully
             completes, an order list of node names
-            will be returned. If the max_traversed was reached, None.
+            will be returned. If the max_traversed was reached, the path and cost are
+            None.
         """
-
+        pop, push = heapq.heappop, heapq.heappush
+        possible_nodes, backward_cost = self.graph.get_possible_nodes, self.graph.backward_cost
+        successor_costs, successor_heuristics = self.successor_costs, self.successor_heuristics
+        if self.profiler is not None:
+            pop, push = self.profiler.timed("heap", pop), self.profiler.timed("heap", push)
+            possible_nodes = self.profiler.timed("successors", possible_nodes)
+            backward_cost = self.profiler.timed("backward_cost", backward_cost)
+            successor_costs = self.profiler.timed("backward_cost", successor_costs)
+            successor_heuristics = self.profiler.timed("heuristic", successor_heuristics)
 
         while self.nodes_traversed < max_traversed:
             # Get node with lowest score (either backward cost or backward cost and heuristic).
+            frontier = len(self.path_queue)
+            self.peak_frontier = max(self.peak_frontier, frontier)
             try:
-                score, path = heapq.heappop(self.path_queue)
+                score, path = pop(self.path_queue)
             except IndexError:
+                if self.incumbent is not None:
+                    return self.incumbent_result()
                 print("[ERROR] - Ran out of nodes to traverse.")
                 raise
 
+            visited = 0
+            for c in path:
+                visited |= 1 << c
+            if self.closed_set and self.is_stale(visited, path[-1], self.graph.backward_cost(path)):
+                continue
+
+            pushed = 0
+
             # If all nodes have been traversed, must consider cost of going back to
             if len(path) == self.graph.n:
                 successor_node = path + [0]
-                value = self.graph.backward_cost(successor_node)
-                heapq.heappush(self.path_queue, (value, successor_node))
+                value = backward_cost(successor_node)
+                if not self.exceeds_bound(value) and not self.is_dominated(visited, 0, value):
+                    push(self.path_queue, (value, successor_node))
+                    pushed += 1
 
             # else add all possible next nodes based on cost, cost+heuristic
             elif len(path) < self.graph.n:
-                # Get all possible successor paths
-                successor_nodes = self.graph.get_possible_nodes(path)
-                successor_paths = [path+[node] for node in successor_nodes]
+                # Get all possible successor nodes, scoring them together.
+                successor_nodes = np.array(possible_nodes(path))
+                costs = successor_costs(path, successor_nodes)
+                values = costs + successor_heuristics(visited, successor_nodes)
 
                 # Add to priority queue with respect to current_cost + heuristic
-                for p in successor_paths:
-                    value = self.graph.backward_cost(p) + self.heuristic(p)
-                    heapq.heappush(self.path_queue, (value, p))
+                for node, cost, value in zip(successor_nodes.tolist(), costs.tolist(), values.tolist()):
+                    if self.exceeds_bound(value) or self.is_dominated(visited | (1 << node), node, cost):
+                        continue
+                    push(self.path_queue, (value, path + [node]))
+                    pushed += 1
 
             # Check node is at goal state.
             if self.is_at_goal_state(path): # and score <= new_score:
                 return (self.nodes_traversed, self.to_letters(path),
                         self.graph.backward_cost(path))
             else:
+                if self.profiler is not None:
+                    self.profiler.record_expansion(frontier, pushed)
                 self.nodes_traversed += 1
 
         print("[WARNING] - Traversal limit reached.")
-        return (self.nodes_traversed, None)
+        return (self.nodes_traversed, None, None)
 
     def to_letters(self, path):
         """ Converts a path in index form to alphabetical form.
@@ -107,11 +236,176 @@ class AStarAlgorithm(object):
         Returns:
             A heuristic of how close this path is to the goal state.
         """
-        remaining = self.graph.get_possible_nodes(x)
-        distances = self.graph.get_closest_distance([x[-1]] + remaining, remaining + [0])
+        visited = 0
+        for c in x:
+            visited |= 1 << c
+        return self.state_heuristic(visited, x[-1])
+
+    def state_heuristic(self, visited: int, last: int) -> float:
+        """ Returns the heuristic value of a search state, using the heuristic chosen
+            at construction.
+
+        Args:
+            visited: A bitmask of the cities visited so far (bit i set for city i).
+            last: The city the path currently ends at.
+
+        Returns:
+            A heuristic of how close this state is to the goal state.
+        """
+        return self.HEURISTICS[self.heuristic_name](self, visited, last)
+
+    def zero_heuristic(self, visited: int, last: int) -> float:
+        """ A heuristic that is always zero, reducing A* to uniform cost search.
+        """
+        return 0
+
+    def nearest_neighbour_heuristic(self, visited: int, last: int) -> float:
+        """ Sums, for the last city and every unvisited city, the distance to its closest
+            city that could still be travelled to (unvisited cities or the start).
 
-        #Check for empty lists
-        if not(distances) or distances[0] < 0:
+        Args:
+            visited: A bitmask of the cities visited so far (bit i set for city i).
+            last: The city the path currently ends at.
+        """
+        remaining = self.graph.remaining_mask(visited)
+        nodes = np.concatenate(([last], np.flatnonzero(remaining)))
+        remaining[0] = True
+        distances = self.graph.closest_distances(nodes, remaining)
+
+        # Check for no city left to travel to.
+        if np.isinf(distances[0]):
             return 0
         else:
-            return sum(distances)
+            return distances.sum()
+
+    def mst_heuristic(self, visited: int, last: int) -> float:
+        """ Lower bounds the remaining tour by the minimum spanning tree of the
+            unvisited cities, plus the cheapest edges connecting it to the last city and
+            back to the start.
+
+        Args:
+            visited: A bitmask of the cities visited so far (bit i set for city i).
+            last: The city the path currently ends at.
+        """
+        dist = self.graph.dist_matrix
+        remaining = [c for c in range(self.graph.n) if not (visited >> c) & 1]
+        if not remaining:
+            return dist[last, 0]
+
+        return (self.mst_cost(visited) + dist[last, remaining].min() +
+                dist[remaining, 0].min())
+
+    def compute_mst_cost(self, visited: int) -> float:
+        """ Computes the cost of the minimum spanning tree over the unvisited cities
+            using Prim's algorithm. Results are memoized per visited bitmask by
+            mst_cost.
+
+        Args:
+            visited: A bitmask of the cities visited so far (bit i set for city i).
+
+        Returns:
+            The total edge cost of the minimum spanning tree.
+        """
+        remaining = [c for c in range(self.graph.n) if not (visited >> c) & 1]
+        if len(remaining) <= 1:
+            return 0
+
+        sub = self.graph.dist_matrix[np.ix_(remaining, remaining)]
+        in_tree = np.zeros(len(remaining), dtype=bool)
+        in_tree[0] = True
+        closest = sub[0].copy()
+        total = 0
+        for _ in range(len(remaining) - 1):
+            closest[in_tree] = np.inf
+            j = np.argmin(closest)
+            total += closest[j]
+            in_tree[j] = True
+            closest = np.minimum(closest, sub[j])
+        return total
+
+    def successor_heuristics(self, visited: int, successors: np.ndarray) -> np.ndarray:
+        """ Returns the heuristic values of all successors of a search state at once.
+            Heuristics without a batched form in BATCH_HEURISTICS are evaluated per
+            successor.
+
+        Args:
+            visited: A bitmask of the cities visited by the parent state.
+            successors: An array of the unvisited cities the parent state can move to.
+
+        Returns:
+            An array, in the respective order, of the heuristic value of the state
+            reached by moving to each successor.
+        """
+        batch = self.BATCH_HEURISTICS.get(self.heuristic_name)
+        if batch is None:
+            return np.array([self.state_heuristic(visited | (1 << c), c) for c in successors.tolist()])
+        return batch(self, visited, successors)
+
+    def zero_heuristics(self, visited: int, successors: np.ndarray) -> np.ndarray:
+        """ Batched form of zero_heuristic.
+        """
+        return np.zeros(len(successors))
+
+    def nearest_neighbour_heuristics(self, visited: int, successors: np.ndarray) -> np.ndarray:
+        """ Batched form of nearest_neighbour_heuristic, for moving from a state to
+            each of its unvisited cities.
+
+            Moving to successor i removes it from the cities that can be travelled to,
+            so a city whose closest allowed city is i falls back to its second closest.
+            Every successor's value is therefore the sum of closest distances, adjusted
+            by the second closest for cities whose closest is that successor.
+
+        Args:
+            visited: A bitmask of the cities visited by the parent state.
+            successors: An array of all cities unvisited by the parent state.
+        """
+        # Rows are successors, columns are cities that may be travelled to: the
+        # successors themselves and then the start.
+        targets = np.append(successors, 0)
+        distances = self.graph.neighbour_matrix[np.ix_(successors, targets)]
+
+        closest = distances.min(axis=1)
+        closest_index = distances.argmin(axis=1)
+        second_closest = np.partition(distances, 1, axis=1)[:, 1]
+
+        adjustment = np.bincount(closest_index, weights=second_closest - closest,
+                                 minlength=len(targets))[:len(successors)]
+        return closest.sum() + adjustment
+
+    def mst_heuristics(self, visited: int, successors: np.ndarray) -> np.ndarray:
+        """ Batched form of mst_heuristic, for moving from a state to each of its
+            unvisited cities.
+
+        Args:
+            visited: A bitmask of the cities visited by the parent state.
+            successors: An array of all cities unvisited by the parent state.
+        """
+        dist = self.graph.dist_matrix
+        if len(successors) == 1:
+            return dist[successors, 0]
+
+        # Closest remaining city to each successor once it has been visited.
+        to_remaining = self.graph.neighbour_matrix[np.ix_(successors, successors)].min(axis=1)
+
+        # Closest remaining city to the start, excluding each successor in turn.
+        to_start = dist[successors, 0]
+        order = np.argsort(to_start)
+        from_start = np.full(len(successors), to_start[order[0]])
+        from_start[order[0]] = to_start[order[1]]
+
+        trees = np.array([self.mst_cost(visited | (1 << c)) for c in successors.tolist()])
+        return trees + to_remaining + from_start
+
+    # Heuristics selectable by name, each taking (visited bitmask, last city).
+    HEURISTICS = {
+        "zero": zero_heuristic,
+        "nearest": nearest_neighbour_heuristic,
+        "mst": mst_heuristic,
+    }
+
+    # Batched heuristics, each taking (parent visited bitmask, successor cities).
+    BATCH_HEURISTICS = {
+        "zero": zero_heuristics,
+        "nearest": nearest_neighbour_heuristics,
+        "mst": mst_heuristics,
+    }
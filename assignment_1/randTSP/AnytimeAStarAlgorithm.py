@@ -0,0 +1,205 @@
+from array import array
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+import heapq
+
+import numpy as np
+
+from GraphInterface import GraphInterface
+from BitmaskAStarAlgorithm import BitmaskAStarAlgorithm
+
+
+class AnytimeAStarAlgorithm(BitmaskAStarAlgorithm):
+    """ Class to run an anytime A* search on a graph dataset.
+
+    Runs a sequence of weighted A* searches (scoring nodes by backward cost plus weight
+    times heuristic) with decreasing weights, restarting after each tour found. Higher
+    weights find a tour quickly, and every later search prunes nodes which cannot beat
+    the best tour so far. The last weight is 1, an ordinary A* search, which proves the
+    final tour optimal.
+
+    Every time a better tour is found, a proven lower bound on the optimal cost is taken
+    from the smallest unweighted score left on the queue.
+    """
+    WEIGHTS = (3.0, 2.0, 1.5, 1.25, 1.0)
+
+    def __init__(self, graph: GraphInterface, closed_set: bool=False,
+                 heuristic: str="nearest", mst_cache_size: int=2**16,
+                 upper_bound: bool=False, weights: Tuple[float, ...]=WEIGHTS):
+        """
+
+        Args:
+            graph: The problem to search over.
+            closed_set: If True, prune paths to already reached states.
+            heuristic: The name of the heuristic to use, a key of HEURISTICS.
+            mst_cache_size: The number of minimum spanning tree costs to keep cached.
+            upper_bound: If True, start from a constructed tour (nearest neighbour and
+                2-opt) as the best tour so far.
+            weights: The decreasing heuristic weights of each search, ending in 1.
+        """
+        if weights[-1] != 1:
+            raise ValueError("The last weight must be 1 for the search to finish optimally.")
+        self.weights = weights
+        super().__init__(graph, closed_set=closed_set, heuristic=heuristic,
+                         mst_cache_size=mst_cache_size, upper_bound=upper_bound)
+
+    def reset(self):
+        self.nodes_traversed = 0
+        self.nodes_pruned = 0
+        self.stale_skipped = 0
+        self.bound_pruned = 0
+        self.peak_frontier = 0
+        self.full_mask = (1 << self.graph.n) - 1
+
+        self.best_tour = self.incumbent
+        self.best_tour_cost = self.bound
+        self.lower_bound = self.state_heuristic(1, 0)
+        self.restart(self.weights[0])
+
+    def restart(self, weight: float):
+        """ Clears the node pool and queue to start a new search.
+
+        Args:
+            weight: The weight of the heuristic in the new search's scores.
+        """
+        self.weight = weight
+        self.best_cost = {}
+        self.visited = array("Q")
+        self.last = array("h")
+        self.cost = array("d")
+        self.parent = array("l")
+
+        # Queue entries are (weighted score, unweighted score, node).
+        self.path_queue = []
+        root = self.add_node(1, 0, 0.0, -1)
+        h = self.state_heuristic(1, 0)
+        heapq.heappush(self.path_queue, (weight * h, h, root))
+
+    def gap(self) -> float:
+        """ Returns the proven optimality gap of the best tour, as a fraction of its cost.
+        """
+        if self.best_tour is None:
+            return np.inf
+        if self.best_tour_cost == 0:
+            return 0.0
+        return max(0.0, (self.best_tour_cost - self.lower_bound) / self.best_tour_cost)
+
+    def solutions(self, max_traversed=10000000, time_budget: Optional[float]=None
+                  ) -> Iterator[Tuple[List[str], float, float, float]]:
+        """ Runs the anytime search, yielding each improved tour as it is found.
+
+        Args:
+            max_traversed: The number of nodes to traverse (over all searches) before
+                stopping.
+            time_budget: The number of seconds to search for before stopping, None for
+                no limit.
+
+        Returns:
+            An iterator of (solution path, cost, lower bound, optimality gap) tuples.
+            The last tuple has a gap of 0 if the search finished.
+        """
+        start = datetime.now()
+        if self.best_tour is not None:
+            yield (self.to_letters(self.best_tour), self.best_tour_cost, self.lower_bound,
+                   self.gap())
+
+        for weight in self.weights:
+            if weight != self.weight:
+                self.restart(weight)
+
+            found = False
+            while self.path_queue:
+                if self.nodes_traversed >= max_traversed:
+                    return
+                if time_budget is not None and (datetime.now() - start).total_seconds() > time_budget:
+                    return
+
+                self.peak_frontier = max(self.peak_frontier, len(self.path_queue))
+                _, score, node = heapq.heappop(self.path_queue)
+
+                # Cannot improve on the best tour so far.
+                if score >= self.best_tour_cost:
+                    continue
+
+                if self.is_at_goal_node(node):
+                    found = True
+                    self.best_tour = self.get_path(node)
+                    self.best_tour_cost = self.cost[node]
+
+                    # The optimal tour must pass through a queued node (or be this one).
+                    bound = min([self.best_tour_cost] + [e[1] for e in self.path_queue])
+                    self.lower_bound = max(self.lower_bound, bound)
+                    if weight == 1:
+                        self.lower_bound = self.best_tour_cost
+
+                    yield (self.to_letters(self.best_tour), self.best_tour_cost,
+                           self.lower_bound, self.gap())
+                    break
+
+                visited, last, cost = self.visited[node], self.last[node], self.cost[node]
+                if self.is_stale(visited, last, cost):
+                    continue
+                self.expand(node, visited, last, cost)
+                self.nodes_traversed += 1
+
+            # Every remaining path was pruned by the best tour, so it is optimal.
+            if not found:
+                if self.best_tour is not None and self.lower_bound < self.best_tour_cost:
+                    self.lower_bound = self.best_tour_cost
+                    yield (self.to_letters(self.best_tour), self.best_tour_cost,
+                           self.lower_bound, self.gap())
+                return
+
+            if weight == 1:
+                return
+
+    def expand(self, node: int, visited: int, last: int, cost: float):
+        """ Pushes the successors of a node which could still beat the best tour.
+
+        Args:
+            node: The index of the node in the node pool.
+            visited: A bitmask of the cities visited by the node's path.
+            last: The city the node's path ends at.
+            cost: The backward cost of the node's path.
+        """
+        dist = self.graph.dist_matrix
+        if visited == self.full_mask:
+            successors = np.array([0])
+            costs = cost + dist[last, successors]
+            estimates = np.zeros(1)
+        else:
+            successors = np.flatnonzero(self.graph.remaining_mask(visited))
+            costs = cost + dist[last, successors]
+            estimates = self.successor_heuristics(visited, successors)
+
+        for c, successor_cost, h in zip(successors.tolist(), costs.tolist(), estimates.tolist()):
+            if successor_cost + h >= self.best_tour_cost:
+                self.bound_pruned += 1
+                continue
+            if self.is_dominated(visited | (1 << c), c, successor_cost):
+                continue
+            successor = self.add_node(visited | (1 << c), c, successor_cost, node)
+            heapq.heappush(self.path_queue,
+                           (successor_cost + self.weight * h, successor_cost + h, successor))
+
+    def run(self, max_traversed=10000000, time_budget: Optional[float]=None
+            ) -> Tuple[int, Optional[List[str]], Optional[float]]:
+        """ Runs the anytime search to completion or until a limit is reached.
+
+        Args:
+            max_traversed: The number of nodes to traverse before stopping.
+            time_budget: The number of seconds to search for before stopping, None for
+                no limit.
+
+        Returns:
+            Returns a tuple containing the number of nodes expanded, the best solution
+            path and its cost. If no tour was found within the limits, the path and
+            cost are None.
+        """
+        for _ in self.solutions(max_traversed, time_budget):
+            pass
+
+        if self.best_tour is None:
+            print("[WARNING] - Traversal limit reached.")
+            return (self.nodes_traversed, None, None)
+        return (self.nodes_traversed, self.to_letters(self.best_tour), self.best_tour_cost)
@@ -0,0 +1,162 @@
+from array import array
+from typing import List, Optional, Tuple
+import heapq
+
+import numpy as np
+
+from GraphInterface import GraphInterface
+from AStarAlgorithm import AStarAlgorithm
+
+
+class BitmaskAStarAlgorithm(AStarAlgorithm):
+    """ Class to run an A* search on a graph dataset using compact search nodes.
+
+    Rather than storing whole paths on the priority queue, each search node is a
+    record in an array-backed node pool holding the visited cities as a bitmask, the
+    last city, the backward cost and a pointer to its parent node. The priority queue
+    only holds (score, node index) pairs and backward costs are carried forward
+    incrementally.
+    """
+
+    def reset(self):
+        self.nodes_traversed = 0
+        self.nodes_pruned = 0
+        self.stale_skipped = 0
+        self.bound_pruned = 0
+        self.peak_frontier = 0
+        self.best_cost = {}
+        self.path_queue = []
+
+        # Node pool, indexed by node id.
+        self.visited = array("Q")
+        self.last = array("h")
+        self.cost = array("d")
+        self.parent = array("l")
+
+        self.full_mask = (1 << self.graph.n) - 1
+
+        root = self.add_node(1, 0, 0.0, -1)
+        heapq.heappush(self.path_queue, (0 + self.state_heuristic(1, 0), root))
+
+    def add_node(self, visited: int, last: int, cost: float, parent: int) -> int:
+        """ Adds a search node to the node pool.
+
+        Args:
+            visited: A bitmask of the cities visited by the node's path.
+            last: The city the node's path ends at.
+            cost: The backward cost of the node's path.
+            parent: The index of the parent node, -1 if the node is the root.
+
+        Returns:
+            The index of the new node in the node pool.
+        """
+        self.visited.append(visited)
+        self.last.append(last)
+        self.cost.append(cost)
+        self.parent.append(parent)
+        return len(self.parent) - 1
+
+    def is_at_goal_node(self, node: int) -> bool:
+        """ Checks a search node against the goal state.
+
+        Args:
+            node: The index of a node in the node pool.
+
+        Returns:
+            True, if the node's path visits every city and has returned to the start
+            city, False otherwise.
+        """
+        return (self.visited[node] == self.full_mask and self.last[node] == 0
+                and self.parent[node] >= 0)
+
+    def successor_costs(self, cost: float, last: int, successors: np.ndarray) -> np.ndarray:
+        """ Returns the backward costs of moving from a node's last city to each
+            successor, given the node's backward cost.
+        """
+        return cost + self.graph.dist_matrix[last, successors]
+
+    def run(self, max_traversed=10000000) -> Tuple[int, Optional[List[str]], Optional[float]]:
+        """ Runs the A* search, profiling it as AStarAlgorithm.run does.
+
+        Args:
+            max_traversed: The number of nodes to traverse before stopping.
+
+        Returns:
+            Returns a tuple containing the number of nodes expanded, the solution
+            path and the overall cost of the solution. If the max_traversed was
+            reached, the path and cost are None.
+        """
+        pop, push = heapq.heappop, heapq.heappush
+        remaining_mask, successor_costs = self.graph.remaining_mask, self.successor_costs
+        successor_heuristics = self.successor_heuristics
+        if self.profiler is not None:
+            pop, push = self.profiler.timed("heap", pop), self.profiler.timed("heap", push)
+            remaining_mask = self.profiler.timed("successors", remaining_mask)
+            successor_costs = self.profiler.timed("backward_cost", successor_costs)
+            successor_heuristics = self.profiler.timed("heuristic", successor_heuristics)
+
+        while self.nodes_traversed < max_traversed:
+            # Get node with lowest score (backward cost and heuristic).
+            frontier = len(self.path_queue)
+            self.peak_frontier = max(self.peak_frontier, frontier)
+            try:
+                score, node = pop(self.path_queue)
+            except IndexError:
+                if self.incumbent is not None:
+                    return self.incumbent_result()
+                print("[ERROR] - Ran out of nodes to traverse.")
+                raise
+
+            if self.is_at_goal_node(node):
+                return (self.nodes_traversed, self.to_letters(self.get_path(node)),
+                        self.cost[node])
+
+            visited, last, cost = self.visited[node], self.last[node], self.cost[node]
+            if self.is_stale(visited, last, cost):
+                continue
+
+            pushed = 0
+
+            # If all nodes have been traversed, must consider cost of going back to start.
+            if visited == self.full_mask:
+                value = successor_costs(cost, last, 0)
+                if not self.exceeds_bound(value) and not self.is_dominated(visited, 0, value):
+                    push(self.path_queue, (value, self.add_node(visited, 0, value, node)))
+                    pushed += 1
+
+            # else add all possible next nodes based on cost+heuristic, scoring them
+            # together.
+            else:
+                successors = np.flatnonzero(remaining_mask(visited))
+                costs = successor_costs(cost, last, successors)
+                values = costs + successor_heuristics(visited, successors)
+
+                for c, successor_cost, value in zip(successors.tolist(), costs.tolist(), values.tolist()):
+                    successor_visited = visited | (1 << c)
+                    if self.exceeds_bound(value) or self.is_dominated(successor_visited, c, successor_cost):
+                        continue
+                    successor = self.add_node(successor_visited, c, successor_cost, node)
+                    push(self.path_queue, (value, successor))
+                    pushed += 1
+
+            if self.profiler is not None:
+                self.profiler.record_expansion(frontier, pushed)
+            self.nodes_traversed += 1
+
+        print("[WARNING] - Traversal limit reached.")
+        return (self.nodes_traversed, None, None)
+
+    def get_path(self, node: int) -> List[int]:
+        """ Reconstructs the path of a search node by following parent pointers.
+
+        Args:
+            node: The index of a node in the node pool.
+
+        Returns:
+            An ordered list of city indices from the start city to the node's city.
+        """
+        path = []
+        while node >= 0:
+            path.append(self.last[node])
+            node = self.parent[node]
+        return path[::-1]
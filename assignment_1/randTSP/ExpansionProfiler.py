@@ -0,0 +1,62 @@
+from collections import Counter
+from time import perf_counter
+from typing import Callable, Dict
+
+
+class ExpansionProfiler(object):
+    """ Records where a search spends its time, and the shape of its search tree.
+
+    Time is accumulated per phase of node expansion (heap operations, successor
+    generation, backward cost and heuristic evaluation). For every expansion, the size
+    of the frontier (bucketed by powers of two) and the number of successors pushed are
+    also counted.
+    """
+    PHASES = ("heap", "successors", "backward_cost", "heuristic")
+
+    def __init__(self):
+        self.seconds = dict((p, 0.0) for p in ExpansionProfiler.PHASES)
+        self.calls = dict((p, 0) for p in ExpansionProfiler.PHASES)
+        self.frontier_sizes = Counter()
+        self.branching = Counter()
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        """ Wraps a function so every call to it is timed as part of a phase.
+
+        Args:
+            name: The phase, one of PHASES.
+            function: The function to time.
+        """
+        def timed_function(*args):
+            start = perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self.seconds[name] += perf_counter() - start
+                self.calls[name] += 1
+        return timed_function
+
+    def record_expansion(self, frontier: int, pushed: int):
+        """ Records the shape of the search at a node expansion.
+
+        Args:
+            frontier: The number of nodes on the frontier when the node was popped.
+            pushed: The number of successors of the node added to the frontier.
+        """
+        self.frontier_sizes[1 << frontier.bit_length()] += 1
+        self.branching[pushed] += 1
+
+    def report(self) -> Dict[str, object]:
+        """ Returns the recorded profile as a JSON serialisable dictionary.
+
+        Returns:
+            A dictionary with the seconds and calls of each phase, a histogram of
+            frontier sizes (keyed by the power of two each size is below) and a
+            histogram of successors pushed per expansion.
+        """
+        return {
+            "phases": dict((p, {"seconds": self.seconds[p], "calls": self.calls[p]})
+                           for p in ExpansionProfiler.PHASES),
+            "frontier_histogram": dict((f"<{k}", v) for k, v in sorted(self.frontier_sizes.items())),
+            "branching_histogram": dict((str(k), v) for k, v in sorted(self.branching.items())),
+        }
+
@@ -1,20 +1,41 @@
+import hashlib
+import os
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from scipy.spatial import distance
 
 class GraphInterface(object):
     """ Provides an abstraction for algorithms to interact with the underlying data.
     """
-    def __init__(self, cities: np.array):
+    def __init__(self, cities: np.array, dist_matrix: Optional[np.array]=None,
+                 neighbours: Optional[np.array]=None):
+        """
+
+        Args:
+            cities: A nx2 array of city co-ordinates.
+            dist_matrix: The precomputed nxn distance matrix, if available.
+            neighbours: The precomputed nxn array of city indices where each row is
+                sorted by increasing distance, if available.
+        """
         self.cities = cities
 
         if cities.ndim != 2 or cities.shape[1] != 2:
             raise ValueError(f"Cities must be a nx2 Numpy array, not {cities.shape}.")
 
         self.n = cities.shape[0]
-        self.dist_matrix = distance.cdist(self.cities, self.cities, "euclidean")
+        if dist_matrix is None:
+            dist_matrix = distance.cdist(self.cities, self.cities, "euclidean")
+        if neighbours is None:
+            neighbours = np.argsort(dist_matrix, axis=1)
+        self.dist_matrix = dist_matrix
+        self.neighbours = neighbours
         self.closest_cities = self.construct_closest_cities()
 
+        # Distance matrix where a city is never its own neighbour, and the bit of each
+        # city in a visited bitmask.
+        self.neighbour_matrix = self.dist_matrix + np.diag(np.full(self.n, np.inf))
+        self.city_bits = 1 << np.arange(self.n, dtype=np.int64)
+
     def construct_closest_cities(self) -> Dict[int, List[int]]:
         """ Constructs a mapping between cities and an ordered list of closest city
             indices.
@@ -23,7 +44,7 @@ class GraphInterface(object):
             A mapping from city indices (int) to an ordered list of city indices
             sorted by increasing order of euclidean distance.
         """
-        return dict([(i, list(np.argsort(self.dist_matrix[i,:]))[1:]) for i in range(self.n)])
+        return dict([(i, list(self.neighbours[i, 1:])) for i in range(self.n)])
 
     def reset(self):
         return None
@@ -45,6 +66,81 @@ class GraphInterface(object):
             cost += self.dist_matrix[path[i], path[i+1]]
         return cost
 
+    def nearest_neighbour_tour(self) -> List[int]:
+        """ Constructs a tour by always travelling to the closest unvisited city.
+
+        Returns:
+            An ordered list of city indices starting and ending at city 0.
+        """
+        tour = [0]
+        remaining = np.ones(self.n, dtype=bool)
+        remaining[0] = False
+        for _ in range(self.n - 1):
+            city = int(np.where(remaining, self.dist_matrix[tour[-1]], np.inf).argmin())
+            tour.append(city)
+            remaining[city] = False
+        return tour + [0]
+
+    def two_opt(self, tour: List[int]) -> List[int]:
+        """ Improves a tour by reversing segments while doing so shortens it, until no
+            single reversal does.
+
+        Args:
+            tour: An ordered list of city indices starting and ending at city 0.
+
+        Returns:
+            The improved tour, starting and ending at city 0.
+        """
+        tour = np.array(tour)
+        improved = True
+        while improved:
+            improved = False
+            for i in range(1, len(tour) - 2):
+                # Cost change of reversing tour[i:j+1], for every j after i.
+                j = np.arange(i + 1, len(tour) - 1)
+                delta = (self.dist_matrix[tour[i - 1], tour[j]] + self.dist_matrix[tour[i], tour[j + 1]]
+                         - self.dist_matrix[tour[i - 1], tour[i]] - self.dist_matrix[tour[j], tour[j + 1]])
+                best = delta.argmin()
+                if delta[best] < -1e-9:
+                    tour[i:j[best] + 1] = tour[i:j[best] + 1][::-1]
+                    improved = True
+        return tour.tolist()
+
+    def constructive_tour(self) -> Tuple[List[int], float]:
+        """ Quickly constructs a good tour, by nearest neighbour improved with 2-opt.
+
+        Returns:
+            A tuple of the tour, starting and ending at city 0, and its cost.
+        """
+        tour = self.two_opt(self.nearest_neighbour_tour())
+        return (tour, self.backward_cost(tour))
+
+    def remaining_mask(self, visited: int) -> np.ndarray:
+        """ Converts a bitmask of visited cities to a boolean mask of unvisited cities.
+
+        Args:
+            visited: A bitmask of visited cities (bit i set for city i).
+
+        Returns:
+            A boolean array of length n, True for each city not yet visited.
+        """
+        return (visited & self.city_bits) == 0
+
+    def closest_distances(self, nodes: np.ndarray, remaining: np.ndarray) -> np.ndarray:
+        """ For a batch of nodes, finds the distance to the closest other city allowed
+            by a mask, as a single masked minimum over rows of the distance matrix.
+
+        Args:
+            nodes: An array of city indices to find closest distances from.
+            remaining: A boolean array of length n, True for cities that may be
+                travelled to.
+
+        Returns:
+            An array, in the respective order, of the distance to the closest allowed
+            city for each node, or infinity if no city is allowed.
+        """
+        return np.where(remaining, self.neighbour_matrix[nodes], np.inf).min(axis=1)
+
     def get_closest_distance(self, nodes: List[int], travel_to: List[int]) -> List[float]:
         """ For each node, finds the distance of the closest city of which are also in
             the list of nodes.
@@ -57,11 +153,12 @@ class GraphInterface(object):
             A list, in the respective order, of the distance to the closest city in
             the list of nodes for each node in the list.
         """
-        # Sort closest city (in those allowed in travel_to) for each node
-        filtered_cities = list(map(lambda x: [c for c in self.closest_cities[x] if c in travel_to], nodes))
+        remaining = np.zeros(self.n, dtype=bool)
+        remaining[travel_to] = True
+        distances = self.closest_distances(np.array(nodes, dtype=int), remaining)
 
-        # Return distance to closest city for each node.
-        return [self.dist_matrix[x[0], i] if len(x) > 0 else -1 for (x, i) in zip(filtered_cities, nodes)]
+        # Return distance to closest city for each node, -1 if there is none.
+        return list(np.where(np.isinf(distances), -1, distances))
 
     def get_possible_nodes(self, path: List[int]) -> List[int]:
         """ Gets the possible nodes that have not been traversed by the path.
@@ -74,12 +171,48 @@ class GraphInterface(object):
         return list(set(range(self.problem_size())).difference(set(path)))
 
     @staticmethod
-    def fromFile(filename: str) -> object:
-        with open(filename) as f:
-            data = f.readlines()
-        converted = map(lambda x: (int(x[1]), int(x[2])), map(lambda y: y.split(" "), data[1:]))
+    def fromFile(filename: str, cache_dir: Optional[str]=None) -> object:
+        """ Loads a problem file.
+
+        Args:
+            filename: The problem file, a count line followed by one "<NAME> <X> <Y>"
+                line per city.
+            cache_dir: If given, a directory of .npz files, keyed by a hash of the
+                problem file's contents, holding the co-ordinates, distance matrix and
+                sorted neighbours of previously loaded problems. Problems found in the
+                cache skip parsing and precomputation, others are added to it.
 
-        return GraphInterface(np.array(list(converted)))
+        Returns:
+            The loaded GraphInterface.
+        """
+        with open(filename, "rb") as f:
+            raw = f.read()
+
+        if cache_dir is None:
+            return GraphInterface(GraphInterface.parse_cities(raw))
+
+        cached = os.path.join(cache_dir, f"{hashlib.sha1(raw).hexdigest()}.npz")
+        if os.path.exists(cached):
+            with np.load(cached) as data:
+                return GraphInterface(data["cities"], data["dist_matrix"], data["neighbours"])
+
+        g = GraphInterface(GraphInterface.parse_cities(raw))
+
+        # Write to a temporary file first, as other processes may be loading the same problem.
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = f"{cached}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, cities=g.cities, dist_matrix=g.dist_matrix, neighbours=g.neighbours)
+        os.replace(temporary, cached)
+        return g
+
+    @staticmethod
+    def parse_cities(raw: bytes) -> np.array:
+        """ Parses the contents of a problem file into a nx2 array of co-ordinates.
+        """
+        data = raw.decode().splitlines()
+        converted = map(lambda x: (int(x[1]), int(x[2])), map(lambda y: y.split(" "), data[1:]))
+        return np.array(list(converted))
 
 if __name__ == "__main__":
     print(GraphInterface.fromFile("problems/5/instance_4.txt").cities)
@@ -0,0 +1,90 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from GraphInterface import GraphInterface
+from AStarAlgorithm import AStarAlgorithm
+
+
+class HeldKarpAlgorithm(object):
+    """ Class to solve a graph dataset exactly with the Held-Karp dynamic program.
+
+    For every subset of cities (other than the start) and every city in it, finds the
+    cheapest path which starts at city 0, visits exactly that subset and ends at that
+    city. Subsets are processed in order of size, and all subsets of one size are
+    extended by a city with a single vectorized minimum. This takes O(2^n n^2) time and
+    O(2^n n) memory, independent of how good any heuristic is, and so serves as ground
+    truth for the A* engines on small problems.
+    """
+    # The most cities solved. Solving 21 cities peaks at about 330MB, and each extra city
+    # more than doubles it.
+    MAX_CITIES = 21
+
+    def __init__(self, graph: GraphInterface):
+        if graph.n > HeldKarpAlgorithm.MAX_CITIES:
+            raise ValueError(f"Held-Karp solves at most {HeldKarpAlgorithm.MAX_CITIES} cities, "
+                             f"not {graph.n}.")
+        self.graph = graph
+        graph.reset()
+        self.reset()
+
+    def reset(self):
+        self.nodes_traversed = 0
+
+    def run(self, max_traversed=None) -> Tuple[int, Optional[List[str]], float]:
+        """ Runs the Held-Karp dynamic program.
+
+        Args:
+            max_traversed: Unused, accepted for compatibility with the A* engines.
+
+        Returns:
+            Returns a tuple containing the number of (subset, last city) states
+            evaluated, the optimal solution path and its cost.
+        """
+        n = self.graph.n
+        if n == 1:
+            return (0, self.to_letters([0, 0]), 0.0)
+
+        # Cities 1..n-1 are bits 0..m-1 of a subset.
+        m = n - 1
+        dist = self.graph.dist_matrix[1:, 1:]
+        from_start = self.graph.dist_matrix[0, 1:]
+        to_start = self.graph.dist_matrix[1:, 0]
+
+        # cost[subset, j] is the cheapest path from 0 through subset, ending at city j+1.
+        cost = np.full((1 << m, m), np.inf)
+        parent = np.full((1 << m, m), -1, dtype=np.int8)
+        bits = 1 << np.arange(m)
+        cost[bits, np.arange(m)] = from_start
+
+        subsets = np.arange(1 << m)
+        sizes = np.zeros(1 << m, dtype=np.int64)
+        for b in bits:
+            sizes += (subsets & b) > 0
+
+        for size in range(2, m + 1):
+            layer = subsets[sizes == size]
+            for j in range(m):
+                ending = layer[(layer & bits[j]) > 0]
+                previous = cost[ending ^ bits[j]] + dist[:, j]
+                parent[ending, j] = previous.argmin(axis=1)
+                cost[ending, j] = previous.min(axis=1)
+                self.nodes_traversed += len(ending)
+        self.nodes_traversed += m
+
+        # Close the tour and follow parents back from the full subset.
+        full = (1 << m) - 1
+        totals = cost[full] + to_start
+        last = int(totals.argmin())
+        path = [0]
+        subset = full
+        while last >= 0:
+            path.append(last + 1)
+            previous = int(parent[subset, last])
+            subset ^= 1 << last
+            last = previous
+        path.append(0)
+
+        return (self.nodes_traversed, self.to_letters(path[::-1]), float(totals.min()))
+
+    to_letters = AStarAlgorithm.to_letters
@@ -0,0 +1,122 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from GraphInterface import GraphInterface
+from AStarAlgorithm import AStarAlgorithm
+
+
+class IDAStarAlgorithm(AStarAlgorithm):
+    """ Class to run an iterative deepening A* search on a graph dataset.
+
+    Each iteration is a depth first search which abandons any path whose backward cost
+    plus heuristic exceeds a threshold. The threshold starts at the heuristic value of
+    the start city and is raised to the smallest abandoned value after every failed
+    iteration. Memory use is bounded by the depth first stack, at the price of
+    re-expanding nodes on every iteration.
+
+    nodes_traversed counts expansions over all iterations, but bound_pruned counts only
+    the pushes pruned by the constructed tour in the latest iteration, as every
+    iteration prunes the same subtrees again.
+    """
+
+    def __init__(self, graph: GraphInterface, closed_set: bool=False,
+                 heuristic: str="nearest", mst_cache_size: int=2**16,
+                 upper_bound: bool=False):
+        if closed_set:
+            raise ValueError("IDA* does not keep a closed set.")
+        super().__init__(graph, closed_set=closed_set, heuristic=heuristic,
+                         mst_cache_size=mst_cache_size, upper_bound=upper_bound)
+
+    def reset(self):
+        self.nodes_traversed = 0
+        self.nodes_pruned = 0
+        self.stale_skipped = 0
+        self.bound_pruned = 0
+        self.iterations = 0
+        self.peak_frontier = 0
+        self.threshold = self.state_heuristic(1, 0)
+
+    def run(self, max_traversed=10000000) -> Tuple[int, Optional[List[str]], Optional[float]]:
+        """ Runs the IDA* search
+
+        Args:
+            max_traversed: The number of nodes to traverse (over all iterations)
+                before stopping.
+
+        Returns:
+            Returns a tuple containing the number of nodes expanded, the solution
+            path and the overall cost of the solution. If the max_traversed was
+            reached, the path and cost are None.
+        """
+        while self.nodes_traversed < max_traversed:
+            self.iterations += 1
+            path, cost, next_threshold = self.search(max_traversed)
+
+            if path is not None:
+                return (self.nodes_traversed, self.to_letters(path), cost)
+
+            # Every path left was pruned by the constructed tour, so it is optimal.
+            if next_threshold == np.inf and self.incumbent is not None:
+                return self.incumbent_result()
+
+            if next_threshold == np.inf:
+                print("[ERROR] - Ran out of nodes to traverse.")
+                raise IndexError("Ran out of nodes to traverse.")
+            self.threshold = next_threshold
+
+        print("[WARNING] - Traversal limit reached.")
+        return (self.nodes_traversed, None, None)
+
+    def search(self, max_traversed: int) -> Tuple[Optional[List[int]], Optional[float], float]:
+        """ Runs a single depth first iteration bounded by the current threshold.
+
+        Args:
+            max_traversed: The number of nodes to traverse before stopping.
+
+        Returns:
+            A tuple of the solution path and its cost (both None if no solution is
+            within the threshold), and the smallest score that exceeded the threshold.
+        """
+        n = self.graph.n
+        dist = self.graph.dist_matrix
+        full_mask = (1 << n) - 1
+        next_threshold = np.inf
+        self.bound_pruned = 0
+
+        # Path of the node currently being expanded, indexed by depth.
+        path = [0] * (n + 1)
+
+        # Entries are (visited bitmask, last city, backward cost, depth).
+        stack = [(1, 0, 0.0, 0)]
+        while stack and self.nodes_traversed < max_traversed:
+            self.peak_frontier = max(self.peak_frontier, len(stack))
+            visited, last, cost, depth = stack.pop()
+            path[depth] = last
+
+            # Path has returned to the start after visiting every city.
+            if depth == n:
+                return (path, cost, next_threshold)
+
+            self.nodes_traversed += 1
+
+            if visited == full_mask:
+                successors = np.array([0])
+                costs = cost + dist[last, successors]
+                values = costs
+            else:
+                successors = np.flatnonzero(self.graph.remaining_mask(visited))
+                costs = cost + dist[last, successors]
+                values = costs + self.successor_heuristics(visited, successors)
+
+            # Push in decreasing order of score so the most promising is expanded first.
+            for i in np.argsort(-values).tolist():
+                if self.exceeds_bound(values[i]):
+                    continue
+                if values[i] > self.threshold:
+                    next_threshold = min(next_threshold, values[i])
+                    continue
+                c = int(successors[i])
+                stack.append((visited | (1 << c), c, costs[i], depth + 1))
+
+        return (None, None, next_threshold)
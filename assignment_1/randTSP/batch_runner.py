@@ -0,0 +1,197 @@
+import csv
+import json
+import os
+import signal
+import sys
+from datetime import datetime
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Tuple
+
+from GraphInterface import GraphInterface
+from timing import build_algorithm, get_option, int_just
+
+FIELDS = ["problem", "size", "engine", "heuristic", "closed", "status", "nodes", "time",
+          "cost", "path", "error"]
+
+# Statuses of finished tasks, which are not run again when resuming. Timed out and failed
+# tasks are retried.
+FINISHED = ("solved", "limit")
+
+
+class TaskTimeout(Exception):
+    """ Raised inside a worker when a problem exceeds its time limit.
+    """
+
+
+def raise_timeout(signum, frame):
+    raise TaskTimeout()
+
+
+def solve_instance(task: Tuple[str, int, str, str, bool, float, Optional[str]]) -> Dict[str, object]:
+    """ Solves a single problem file. Runs inside a worker process.
+
+    Args:
+        task: A tuple of the problem filename, problem size, engine name, heuristic
+            name, whether to use a closed set, the time limit in seconds (0 for
+            no limit) and the directory of cached problems (None to not cache).
+
+    Returns:
+        A result row, keyed by FIELDS. The status is one of "solved", "limit" (node
+        limit reached), "timeout" or "error", with the error's message in "error".
+    """
+    filename, size, engine, heuristic, closed_set, timeout, cache_dir = task
+    row = {"problem": filename, "size": size, "engine": engine, "heuristic": heuristic,
+           "closed": closed_set, "status": "solved", "nodes": "", "time": "",
+           "cost": "", "path": "", "error": ""}
+
+    if timeout > 0:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    start = datetime.now()
+    try:
+        a = build_algorithm(GraphInterface.fromFile(filename, cache_dir), engine, closed_set, heuristic)
+        count, path, cost = a.run(max_traversed=10000000)
+        row.update(nodes=count, cost=cost if cost is not None else "",
+                   path=" ".join(path) if path is not None else "")
+        if path is None:
+            row["status"] = "limit"
+    except TaskTimeout:
+        row["status"] = "timeout"
+    except Exception as e:
+        row.update(status="error", error=str(e))
+    finally:
+        if timeout > 0:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    row["time"] = (datetime.now() - start).total_seconds()
+    return row
+
+
+def task_key(problem: str, engine: str, heuristic: str, closed_set: bool) -> Tuple[str, str, str, bool]:
+    """ Identifies a task, so finished tasks can be skipped when resuming.
+    """
+    return (problem, engine, heuristic, closed_set)
+
+
+def load_results(filename: str) -> List[Dict[str, str]]:
+    """ Loads the results of a previous (possibly partial) sweep.
+
+    Args:
+        filename: The CSV results file.
+
+    Returns:
+        The result rows, empty if the file does not exist.
+    """
+    if not os.path.exists(filename):
+        return []
+    with open(filename, newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    for r in rows:
+        r["size"] = int(r["size"])
+        r["closed"] = r["closed"] == "True"
+        r["time"] = float(r["time"])
+        if r["nodes"]:
+            r["nodes"] = int(r["nodes"])
+        if r["cost"]:
+            r["cost"] = float(r["cost"])
+    return rows
+
+
+def run_sweep(sizes: List[int], out: str, workers: int, timeout: float, engine: str="astar",
+              heuristic: str="nearest", closed_set: bool=False,
+              cache_dir: Optional[str]=None) -> List[Dict[str, object]]:
+    """ Solves every instance of the given problem sizes over a process pool, appending
+        each result to a CSV file as soon as it completes. Instances which were already
+        solved or reached the node limit are skipped, so an interrupted sweep can be
+        resumed by running it again. Instances which timed out or failed are retried,
+        their rows replaced.
+
+    Args:
+        sizes: The problem sizes to solve, each a folder of problems/.
+        out: The CSV results file.
+        workers: The number of worker processes.
+        timeout: The time limit per instance in seconds, 0 for no limit.
+        engine: The name of the search engine to use.
+        heuristic: The name of the heuristic to use.
+        closed_set: If True, prune paths to already reached states.
+        cache_dir: The directory of cached problems to load from, if any.
+
+    Returns:
+        All result rows, including those from previous runs.
+    """
+    results = load_results(out)
+    done = set(task_key(r["problem"], r["engine"], r["heuristic"], r["closed"])
+               for r in results if r["status"] in FINISHED)
+
+    tasks = []
+    for n in sorted(sizes, reverse=True):
+        for f in sorted(os.listdir(f"problems/{n}/")):
+            problem = f"problems/{n}/{f}"
+            if task_key(problem, engine, heuristic, closed_set) not in done:
+                tasks.append((problem, n, engine, heuristic, closed_set, timeout, cache_dir))
+
+    # Drop the rows of retried tasks, rewriting the file so they are not duplicated.
+    retried = set(task_key(t[0], engine, heuristic, closed_set) for t in tasks)
+    results = [r for r in results
+               if task_key(r["problem"], r["engine"], r["heuristic"], r["closed"]) not in retried]
+    print(f"{len(tasks)} instances to solve, {len(results)} results already recorded.")
+
+    with open(out + ".tmp", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    os.replace(out + ".tmp", out)
+
+    with open(out, "a", newline="") as f, Pool(processes=workers) as p:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+
+        for row in p.imap_unordered(solve_instance, tasks):
+            writer.writerow(row)
+            f.flush()
+            results.append(row)
+            print(f"{row['problem']} {row['status']}. Nodes: {row['nodes']}. Time: {int_just(row['time'], 10)}")
+
+    return results
+
+
+def summarise(results: List[Dict[str, object]], engine: str, heuristic: str, closed_set: bool):
+    """ Prints the average nodes and time of solved instances per problem size.
+    """
+    by_size = {}
+    for r in results:
+        if (r["engine"], r["heuristic"], r["closed"]) == (engine, heuristic, closed_set):
+            by_size.setdefault(r["size"], []).append(r)
+
+    for size, rows in sorted(by_size.items()):
+        solved = [r for r in rows if r["status"] == "solved"]
+        if not solved:
+            print(f"Cities: {int_just(size, 3)}Solved: 0/{len(rows)}")
+            continue
+        nodes = sum(r["nodes"] for r in solved) / len(solved)
+        times = sum(r["time"] for r in solved) / len(solved)
+        print(f"Cities: {int_just(size, 3)}Solved: {len(solved)}/{len(rows)} Average Nodes Traversed: {int_just(nodes, 8)} Average Time (s): {int_just(times, 12)}")
+
+
+def main():
+    n = int(sys.argv[1])
+    engine = get_option("engine", "astar")
+    heuristic = get_option("heuristic", "nearest")
+    closed_set = "--closed" in sys.argv
+    workers = int(get_option("workers", str(cpu_count())))
+    timeout = float(get_option("timeout", "0"))
+    out = get_option("out", "results.csv")
+
+    results = run_sweep(list(range(1, n + 1)), out, workers, timeout, engine, heuristic,
+                        closed_set, get_option("cache", None))
+    summarise(results, engine, heuristic, closed_set)
+
+    json_out = get_option("json", "")
+    if json_out:
+        with open(json_out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
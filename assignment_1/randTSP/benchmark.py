@@ -0,0 +1,254 @@
+import json
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Dict, List, Tuple
+
+# The solver modules are only imported inside the functions below. Simulated annealing
+# lives in assignment_2/q1 with its own GraphInterface module of the same name, so each
+# case runs in a freshly spawned process which imports only the modules it needs.
+ANNEALING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                             "assignment_2", "q1")
+
+SOLVERS = ("heldkarp", "astar", "annealing")
+
+# Absolute slack (seconds, kilobytes and gap) added to the relative tolerance, so noise
+# on tiny problems is not reported as a regression.
+TIME_SLACK = 0.005
+MEMORY_SLACK = 64
+GAP_SLACK = 0.01
+
+# Nodes per second are only compared when both runs took at least this many seconds,
+# as the rates of shorter runs are mostly timer and scheduling noise.
+MIN_RATE_TIME = 0.1
+
+
+def run_case(case: Tuple[str, str, int, int, Dict[str, object]]) -> Dict[str, object]:
+    """ Runs a single benchmark case. Runs inside its own worker process.
+
+    Args:
+        case: A tuple of the solver name, problem filename, problem size, random seed
+            and solver options (engine, heuristic, closed, iterations and repeats).
+
+    Returns:
+        A row of the case's nodes (or annealing iterations), time, nodes per second,
+        peak memory allocated by the solve in kilobytes, cost and status.
+    """
+    solver, problem, size, seed, options = case
+
+    if solver == "annealing":
+        sys.path.insert(0, ANNEALING_DIR)
+        from GraphInterface import GraphInterface
+        from simulated_annealing import SimulatedAnnealing
+
+        g = GraphInterface.fromFile(problem)
+        def solve():
+            random.seed(seed)
+            path, costs = SimulatedAnnealing(g).run(max_iterations=options["iterations"])
+            return len(costs) - 1, path, costs[-1]
+    else:
+        from GraphInterface import GraphInterface
+        from timing import build_algorithm
+
+        g = GraphInterface.fromFile(problem)
+        def solve():
+            if solver == "heldkarp":
+                a = build_algorithm(g, "heldkarp")
+            else:
+                a = build_algorithm(g, options["engine"], options["closed"], options["heuristic"])
+            return a.run(max_traversed=10000000)
+
+    # Every repeat solves the problem identically, the fastest is the least noisy.
+    seconds = float("inf")
+    for _ in range(options["repeats"]):
+        start = datetime.now()
+        count, path, cost = solve()
+        seconds = min(seconds, (datetime.now() - start).total_seconds())
+
+    # Once more, untimed, tracing the memory allocated by the solve itself rather than
+    # the interpreter and imports.
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    solve()
+    peak_kb = (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+    tracemalloc.stop()
+
+    return {"solver": solver, "problem": problem, "size": size, "seed": seed,
+            "status": "solved" if path is not None else "limit", "nodes": count,
+            "time": seconds, "nodes_per_sec": count / seconds if seconds > 0 else 0.0,
+            "peak_kb": peak_kb, "cost": float(cost) if cost is not None else None}
+
+
+def build_cases(sizes: List[int], instances: int, seeds: List[int], solvers: List[str],
+                options: Dict[str, object]) -> List[Tuple[str, str, int, int, Dict[str, object]]]:
+    """ Lists the benchmark cases, the first instances of each problem size for every
+        solver, with annealing run once per seed. Held-Karp is skipped for problems too
+        large for it, leaving their gaps unmeasured.
+    """
+    from HeldKarpAlgorithm import HeldKarpAlgorithm
+
+    cases = []
+    for n in sizes:
+        problems = sorted(os.listdir(f"problems/{n}/"),
+                          key=lambda f: int(f.split("_")[1].split(".")[0]))[:instances]
+        for f in problems:
+            for solver in solvers:
+                if solver == "heldkarp" and n > HeldKarpAlgorithm.MAX_CITIES:
+                    continue
+                for seed in (seeds if solver == "annealing" else [0]):
+                    cases.append((solver, f"problems/{n}/{f}", n, seed, options))
+    return cases
+
+
+def run_benchmark(cases: List[Tuple[str, str, int, int, Dict[str, object]]]) -> List[Dict[str, object]]:
+    """ Runs the cases one at a time, each in a fresh process, and fills in each row's
+        cost gap against the Held-Karp optimum of its problem.
+    """
+    from timing import int_just
+
+    rows = []
+    with get_context("spawn").Pool(processes=1, maxtasksperchild=1) as p:
+        for row in p.imap(run_case, cases):
+            rows.append(row)
+            print(f"{row['solver'].ljust(10)}{row['problem'].ljust(28)}Nodes: {int_just(row['nodes'], 8)} Time: {int_just(row['time'], 10)}Cost: {int_just(row['cost'], 6)}")
+
+    optimal = dict((r["problem"], r["cost"]) for r in rows if r["solver"] == "heldkarp")
+    for r in rows:
+        r["gap"] = None
+        if r["problem"] in optimal and r["cost"] is not None:
+            r["gap"] = (r["cost"] - optimal[r["problem"]]) / optimal[r["problem"]] if optimal[r["problem"]] > 0 else 0.0
+    return rows
+
+
+def scaling_curves(rows: List[Dict[str, object]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """ Aggregates the rows of each solver per problem size.
+
+    Returns:
+        A mapping from solver to problem size (as a string, for JSON) to the mean time,
+        nodes per second and gap, and the largest peak memory, of its solved cases.
+    """
+    grouped = {}
+    for r in rows:
+        if r["status"] == "solved":
+            grouped.setdefault(r["solver"], {}).setdefault(r["size"], []).append(r)
+
+    curves = {}
+    for solver, by_size in grouped.items():
+        curves[solver] = {}
+        for size, group in sorted(by_size.items()):
+            gaps = [r["gap"] for r in group if r["gap"] is not None]
+            curves[solver][str(size)] = {
+                "cases": len(group),
+                "time": sum(r["time"] for r in group) / len(group),
+                "nodes_per_sec": sum(r["nodes_per_sec"] for r in group) / len(group),
+                "peak_kb": max(r["peak_kb"] for r in group),
+                "gap": sum(gaps) / len(gaps) if gaps else None,
+            }
+    return curves
+
+
+def compare(curves: Dict[str, Dict[str, Dict[str, float]]],
+            baseline: Dict[str, Dict[str, Dict[str, float]]], tolerance: float) -> List[str]:
+    """ Compares scaling curves against a baseline's.
+
+    Args:
+        curves: The current scaling curves.
+        baseline: The baseline's scaling curves.
+        tolerance: The fraction by which time, nodes per second and peak memory may
+            worsen before being reported. Nodes per second are not compared for
+            problem sizes solved in under MIN_RATE_TIME seconds.
+
+    Returns:
+        A description of each regression, empty if there are none.
+    """
+    regressions = []
+    for solver, by_size in curves.items():
+        for size, current in by_size.items():
+            if size not in baseline.get(solver, {}):
+                continue
+            before = baseline[solver][size]
+            name = f"{solver} with {size} cities"
+            if current["time"] > before["time"] * (1 + tolerance) + TIME_SLACK:
+                regressions.append(f"{name}: time {before['time']:.4f}s -> {current['time']:.4f}s")
+            if (min(current["time"], before["time"]) >= MIN_RATE_TIME and
+                    current["nodes_per_sec"] * (1 + tolerance) < before["nodes_per_sec"]):
+                regressions.append(f"{name}: nodes/sec {before['nodes_per_sec']:.0f} -> {current['nodes_per_sec']:.0f}")
+            if current["peak_kb"] > before["peak_kb"] * (1 + tolerance) + MEMORY_SLACK:
+                regressions.append(f"{name}: peak memory {before['peak_kb']:.1f}KB -> {current['peak_kb']:.1f}KB")
+            if current["gap"] is not None and before["gap"] is not None and current["gap"] > before["gap"] + GAP_SLACK:
+                regressions.append(f"{name}: gap {100 * before['gap']:.2f}% -> {100 * current['gap']:.2f}%")
+    return regressions
+
+
+def print_curves(curves: Dict[str, Dict[str, Dict[str, float]]]):
+    """ Prints each solver's scaling curve, one line per problem size.
+    """
+    from timing import int_just
+
+    for solver, by_size in curves.items():
+        print(f"\n{solver}")
+        for size, c in by_size.items():
+            gap = "" if c["gap"] is None else f" Gap: {int_just(100 * c['gap'], 6)}%"
+            print(f"Cities: {int_just(int(size), 3)}Time (s): {int_just(c['time'], 10)} Nodes/sec: {int_just(round(c['nodes_per_sec']), 10)} Peak (KB): {int_just(round(c['peak_kb'], 1), 8)}{gap}")
+
+
+def main():
+    from timing import get_option
+
+    n = int(sys.argv[1])
+    options = {"engine": get_option("engine", "bitmask"),
+               "heuristic": get_option("heuristic", "mst"),
+               "closed": "--closed" in sys.argv,
+               "iterations": int(get_option("iterations", "10000")),
+               "repeats": int(get_option("repeats", "3"))}
+    solvers = get_option("solvers", ",".join(SOLVERS)).split(",")
+    for s in solvers:
+        if s not in SOLVERS:
+            raise ValueError(f"Unknown solver {s}, must be one of {list(SOLVERS)}.")
+    if "heldkarp" not in solvers:
+        # Held-Karp provides the optimal costs that gaps are measured against.
+        solvers.insert(0, "heldkarp")
+    seeds = [int(s) for s in get_option("seeds", "0,1,2").split(",")]
+    instances = int(get_option("instances", "3"))
+    baseline_file = get_option("baseline", "benchmark_baseline.json")
+    tolerance = float(get_option("tolerance", "0.25"))
+
+    rows = run_benchmark(build_cases(list(range(1, n + 1)), instances, seeds, solvers, options))
+    curves = scaling_curves(rows)
+    print_curves(curves)
+    results = {"options": options, "seeds": seeds, "instances": instances,
+               "curves": curves, "cases": rows}
+
+    out = get_option("out", "")
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if "--update-baseline" in sys.argv:
+        with open(baseline_file, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote baseline to {baseline_file}.")
+        return
+
+    if not os.path.exists(baseline_file):
+        print(f"\nNo baseline at {baseline_file}, run with --update-baseline to record one.")
+        return
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    if (baseline["options"], baseline["seeds"], baseline["instances"]) != (options, seeds, instances):
+        print(f"\n[WARNING] - {baseline_file} was recorded with different options, not comparing.")
+        return
+
+    regressions = compare(curves, baseline["curves"], tolerance)
+    for r in regressions:
+        print(f"[REGRESSION] - {r}")
+    if regressions:
+        sys.exit(1)
+    print(f"\nNo regressions against {baseline_file}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+
+from AStarAlgorithm import AStarAlgorithm
+from GraphInterface import GraphInterface
+from batch_runner import solve_instance
+from timing import build_algorithm
+
+PROBLEM = "problems/8/instance_1.txt"
+
+
+class TestTraversalLimit(unittest.TestCase):
+    def _check(self, engine, **options):
+        a = build_algorithm(GraphInterface.fromFile(PROBLEM), engine, **options)
+        count, path, cost = a.run(max_traversed=3)
+        self.assertEqual(count, 3)
+        self.assertIsNone(path)
+        self.assertIsNone(cost)
+
+    def test_astar_limit(self):
+        self._check("astar")
+
+    def test_astar_closed_limit(self):
+        self._check("astar", closed_set=True)
+
+    def test_astar_profiled_limit(self):
+        self._check("astar", profile=True)
+
+    def test_bitmask_limit(self):
+        self._check("bitmask")
+
+    def test_bitmask_profiled_limit(self):
+        self._check("bitmask", profile=True)
+
+    def test_ida_limit(self):
+        self._check("ida")
+
+    def test_solved_within_limit(self):
+        count, path, cost = build_algorithm(GraphInterface.fromFile(PROBLEM), "astar").run()
+        self.assertEqual(len(path), 9)
+        self.assertEqual((path[0], path[-1]), ("A", "A"))
+        self.assertGreater(cost, 0)
+
+
+class TestSolveInstance(unittest.TestCase):
+    def test_limit_is_recorded(self):
+        run = AStarAlgorithm.run
+        with mock.patch.object(AStarAlgorithm, "run", lambda self, max_traversed: run(self, 3)):
+            row = solve_instance((PROBLEM, 8, "astar", "nearest", False, 0, None))
+        self.assertEqual(row["status"], "limit")
+        self.assertEqual(row["nodes"], 3)
+        self.assertEqual((row["path"], row["cost"], row["error"]), ("", "", ""))
+
+
+if __name__ == '__main__':
+    unittest.main()
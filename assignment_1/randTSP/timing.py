@@ -1,10 +1,25 @@
+import json
 import os
 import sys
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 from GraphInterface import GraphInterface
 from AStarAlgorithm import AStarAlgorithm
+from BitmaskAStarAlgorithm import BitmaskAStarAlgorithm
+from IDAStarAlgorithm import IDAStarAlgorithm
+from AnytimeAStarAlgorithm import AnytimeAStarAlgorithm
+from HeldKarpAlgorithm import HeldKarpAlgorithm
+
+ENGINES = {
+    "astar": AStarAlgorithm,
+    "bitmask": BitmaskAStarAlgorithm,
+    "ida": IDAStarAlgorithm,
+    "anytime": AnytimeAStarAlgorithm,
+    "heldkarp": HeldKarpAlgorithm,
+}
 
 
 def int_just(x:float, size:int) -> str:
@@ -16,47 +31,185 @@ def int_just(x:float, size:int) -> str:
 
     return str(x).ljust(size)
 
-def run_problem_size(n: int, print_individual: bool=True)->List[Tuple[float, float]]:
+def get_option(name: str, default: Optional[str]) -> Optional[str]:
+    """ Gets the value of a `--name=value` command line option.
+
+    Args:
+        name: The name of the option, without leading dashes.
+        default: The value to use if the option was not given.
+    """
+    for arg in sys.argv:
+        if arg.startswith(f"--{name}="):
+            return arg.split("=", 1)[1]
+    return default
+
+def build_algorithm(g: GraphInterface, engine: str="astar", closed_set: bool=False,
+                    heuristic: str="nearest", upper_bound: bool=False, profile: bool=False):
+    """ Constructs the search algorithm for a problem.
+
+    Args:
+        g: The loaded problem.
+        engine: The name of the search engine to use, a key of ENGINES.
+        closed_set: If True, prune paths to already reached states.
+        heuristic: The name of the heuristic to use, a key of AStarAlgorithm.HEURISTICS.
+        upper_bound: If True, prune paths which cannot beat a constructed tour.
+        profile: If True, record per-phase timings and histograms of the search.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}, must be one of {list(ENGINES)}.")
+    if profile and engine not in ("astar", "bitmask"):
+        raise ValueError("Profiling is only supported by the astar and bitmask engines.")
+    if engine == "heldkarp":
+        # The dynamic program is exact without a heuristic or pruning.
+        if closed_set or upper_bound:
+            raise ValueError("The heldkarp engine does not use a closed set or upper bound.")
+        return HeldKarpAlgorithm(g)
+    if profile:
+        return ENGINES[engine](g, closed_set=closed_set, heuristic=heuristic,
+                               upper_bound=upper_bound, profile=profile)
+    return ENGINES[engine](g, closed_set=closed_set, heuristic=heuristic,
+                           upper_bound=upper_bound)
+
+def pruning_summary(a) -> str:
+    """ Formats the closed set and upper bound counters of an algorithm, empty if
+        neither was used.
+    """
+    summary = ""
+    if not isinstance(a, AStarAlgorithm):
+        return summary
+    if a.closed_set:
+        summary += f"Pruned: {int_just(a.nodes_pruned, 8)}Stale: {int_just(a.stale_skipped, 8)}"
+    if a.incumbent is not None:
+        summary += f"Bound Pruned: {int_just(a.bound_pruned, 8)}"
+    return summary
+
+def profile_report(problem: str, a, count: int) -> str:
+    """ Formats the profile of a search as a single line of JSON.
+
+    Args:
+        problem: The problem file searched.
+        a: The profiled search algorithm.
+        count: The number of nodes expanded.
+    """
+    return json.dumps(dict(problem=problem, nodes=count, peak_frontier=a.peak_frontier,
+                           **a.profiler.report()))
+
+def run_anytime(a: AnytimeAStarAlgorithm, time_budget: Optional[float]) -> Tuple[int, Optional[List[str]], Optional[float]]:
+    """ Runs an anytime search, printing each improved tour as it is found.
+
+    Args:
+        a: The anytime search to run.
+        time_budget: The number of seconds to search for, None for no limit.
+    """
+    start = datetime.now()
+    for path, cost, bound, gap in a.solutions(max_traversed=10000000, time_budget=time_budget):
+        print(f"Time: {int_just((datetime.now() - start).total_seconds(), 10)}Nodes: {int_just(a.nodes_traversed, 8)}Cost: {int_just(cost, 6)}Lower Bound: {int_just(bound, 6)}Gap: {int_just(100 * gap, 5)}%")
+    if a.best_tour is None:
+        return (a.nodes_traversed, None, None)
+    return (a.nodes_traversed, a.to_letters(a.best_tour), a.best_tour_cost)
+
+def check_cost(problem: str, g: GraphInterface, cost: Optional[float]) -> bool:
+    """ Checks the cost of a search's solution against the Held-Karp optimum, printing
+        a warning if they differ.
+
+    Args:
+        problem: The problem file searched.
+        g: The loaded problem.
+        cost: The cost of the search's solution, None if none was found.
+
+    Returns:
+        True if the cost is optimal, False if it is not or the problem has too many
+        cities to check.
+    """
+    if g.n > HeldKarpAlgorithm.MAX_CITIES:
+        print(f"[WARNING] - {problem}: not checked, Held-Karp solves at most {HeldKarpAlgorithm.MAX_CITIES} cities.")
+        return False
+    _, _, optimal = HeldKarpAlgorithm(g).run()
+    if cost is None or not np.isclose(cost, optimal):
+        print(f"[WARNING] - {problem}: cost {cost} differs from the Held-Karp optimum {optimal}.")
+        return False
+    return True
+
+def run_problem_size(n: int, print_individual: bool=True, engine: str="astar",
+                     closed_set: bool=False, heuristic: str="nearest",
+                     cache_dir: Optional[str]=None, upper_bound: bool=False,
+                     profile: bool=False, check: bool=False)->List[Tuple[float, float]]:
     """ Runs all problems for a single problem size.
 
     Args:
         n: The size of problems to consider
+        engine: The name of the search engine to use.
+        closed_set: If True, prune paths to already reached states.
+        heuristic: The name of the heuristic to use.
+        cache_dir: The directory of cached problems to load from, if any.
+        upper_bound: If True, prune paths which cannot beat a constructed tour.
+        profile: If True, print a JSON profile of each problem's search.
+        check: If True, check each solution's cost against the Held-Karp optimum.
     """
     times = []
     nodes = []
 
     for f in os.listdir(f"problems/{n}/"):
-        g = GraphInterface.fromFile(f"problems/{n}/{f}")
-        a = AStarAlgorithm(g)
+        g = GraphInterface.fromFile(f"problems/{n}/{f}", cache_dir)
+        a = build_algorithm(g, engine, closed_set, heuristic, upper_bound, profile)
         start = datetime.now()
         count, paths, cost = a.run(max_traversed=10000000)
         end = datetime.now()
         times.append((end - start).total_seconds())
+        if profile:
+            print(profile_report(f"problems/{n}/{f}", a, count))
         if print_individual:
-            print(f"Problem of Size: {n}. Nodes: {int_just(count, 3)}Time: {int_just((end - start).total_seconds(), 10)}Cost: {int_just(cost, 5)}Solution: {paths}")
+            print(f"Problem of Size: {n}. Nodes: {int_just(count, 3)}{pruning_summary(a)}Time: {int_just((end - start).total_seconds(), 10)}Cost: {int_just(cost, 5)}Solution: {paths}")
+        if check:
+            check_cost(f"problems/{n}/{f}", g, cost)
         nodes.append(count)
     return (sum(nodes)/float(n), sum(times)/float(n))
 
 def main():
+    engine = get_option("engine", "astar")
+    closed_set = "--closed" in sys.argv
+    heuristic = get_option("heuristic", "nearest")
+    cache_dir = get_option("cache", None)
+    time_budget = get_option("budget", None)
+    upper_bound = "--upper-bound" in sys.argv
+    profile = "--profile" in sys.argv
+    check = "--check" in sys.argv
     try:
         n = int(sys.argv[1])
 
 
     # Run Single File
     except ValueError:
-        g = GraphInterface.fromFile(sys.argv[1])
-        a = AStarAlgorithm(g)
+        g = GraphInterface.fromFile(sys.argv[1], cache_dir)
+        a = build_algorithm(g, engine, closed_set, heuristic, upper_bound, profile)
         start = datetime.now()
-        count, paths, cost = a.run(max_traversed=10000000)
+        if engine == "anytime":
+            count, paths, cost = run_anytime(a, float(time_budget) if time_budget else None)
+        else:
+            count, paths, cost = a.run(max_traversed=10000000)
         end = datetime.now()
+        if isinstance(a, AStarAlgorithm):
+            if closed_set:
+                print(f"Pruned pushes: {a.nodes_pruned}. Stale pops: {a.stale_skipped}.")
+            if upper_bound:
+                print(f"Constructed tour cost: {int_just(a.bound, 5)}. Bound pruned pushes: {a.bound_pruned}.")
+            print(f"Peak frontier: {a.peak_frontier}.")
+        if profile:
+            print(profile_report(sys.argv[1], a, count))
         print(f"File: {sys.argv[1]}.\nNodes: {count}. \nTime (s): {(end - start).total_seconds()}. \nCost: {int_just(cost,5)} \nSolution: {paths}.")
+        # Checked after printing, so the search's result is shown even if this fails.
+        if check and check_cost(sys.argv[1], g, cost):
+            print("Cost matches the Held-Karp optimum.")
     else:
 
         # Run all files for all problems <= argv[1]
         if len(sys.argv) >=3 and sys.argv[2] == "all":
             results = []
             for i in range(1, n + 1):
-                a, b = run_problem_size(i, print_individual=False)
+                a, b = run_problem_size(i, print_individual=False, engine=engine,
+                                        closed_set=closed_set, heuristic=heuristic,
+                                        cache_dir=cache_dir, upper_bound=upper_bound,
+                                        profile=profile, check=check)
                 results.append((a, b))
 
             for t, i in zip(results, range(1, n+1)):
@@ -65,7 +218,10 @@ def main():
 
         # Run all files for problems of size argv[1]
         else:
-            a, b = run_problem_size(n)
+            a, b = run_problem_size(n, engine=engine, closed_set=closed_set,
+                                    heuristic=heuristic, cache_dir=cache_dir,
+                                    upper_bound=upper_bound, profile=profile,
+                                    check=check)
             print(f"\nFor {n} cities. \nAverage Nodes Traversed: {a} \nAverage Time (s): {b}.")
 
 
@@ -1,24 +1,30 @@
-import sys
-
-from typing import Callable, List, Tuple
-from data_loader import SudokuGrid
-import random
-import numpy as np
+from typing import List, Optional, Tuple, Union
+from data_loader import BitboardSudokuGrid, SudokuGrid
+from propagation import Propagator
 
 
 class BackTrackingTemplate(object):
+    MAX_NODES = 10000
 
-    def __init__(self, initial_grid: SudokuGrid, forward_checking: bool, heuristic: bool):
+    def __init__(self, initial_grid: Union[SudokuGrid, BitboardSudokuGrid],
+                 forward_checking: bool, heuristic: bool,
+                 propagator: Optional[Propagator]=None):
         """
 
         Args:
-            initial_grid: A sudoku grid with initial variables constraints applied.
+            initial_grid: A sudoku grid (of either backend) with initial variables
+                constraints applied.
             forward_checking: If true, perform forward checking in CSP.
             heuristic: If True, perform heuristics in CSP.
+            propagator: If given, propagates constraints after every assignment's
+                forward checking. Requires forward checking.
         """
+        if propagator is not None and not forward_checking:
+            raise ValueError("Constraint propagation requires forward checking.")
         self.grid = initial_grid
         self.forward = forward_checking
         self.heuristic = heuristic
+        self.propagator = propagator
 
 
     def run(self) -> Tuple[List[List[int]], int]:
@@ -29,6 +35,8 @@ class BackTrackingTemplate(object):
             steps is how many partial/complete assignments it had to take,
         """
         self.grid.nodes_assigned = 0
+        if self.propagator is not None and not self.propagator.propagate_all():
+            return (None, self.grid.nodes_assigned)
         try:
             return (self.run_recursive(), self.grid.nodes_assigned)
         except AttributeError as e:
@@ -42,7 +50,7 @@ class BackTrackingTemplate(object):
         """
 
         #Check max node assigments
-        if self.grid.nodes_assigned> 10000:
+        if self.grid.nodes_assigned> BackTrackingTemplate.MAX_NODES:
             raise AttributeError()
 
         # Check recursion has worked.
@@ -69,9 +77,10 @@ class BackTrackingTemplate(object):
             # If forward check is used check forward, and if no solution is possible,
             # don't recurse forward.
             if self.forward:
-                constrained_nodes = self.grid.add_variable_constraint(node, v)
-                if self.forward_check():
-                    self.grid.remove_variable_constraint(constrained_nodes, v)
+                checkpoint = self.grid.mark()
+                self.grid.add_variable_constraint(node, v)
+                if self.forward_check() or not self.propagate(node, checkpoint):
+                    self.grid.undo(checkpoint)
                     self.grid.remove_assignment(node)
                     continue
 
@@ -82,18 +91,33 @@ class BackTrackingTemplate(object):
             if result is not None:
                 return result
 
-            # remove forward check constrains on variables now that this assignment does not work.
+            # remove forward check constrains on variables now that this assignment
+            # does not work. Only values this assignment (and the subtree below it)
+            # removed are restored.
             if self.forward:
-                self.grid.remove_variable_constraint(constrained_nodes, v)
+                self.grid.undo(checkpoint)
 
             self.grid.remove_assignment(node)
 
         # If all subtrees cannot be solved, backtrack
-        if self.forward:
-            self.grid.set_value(node, values)
         return None
 
 
+    def propagate(self, node: Tuple[int, int], checkpoint: int) -> bool:
+        """ Propagates constraints from an assignment and the squares its forward
+            checking changed.
+
+        Args:
+            node: The node which has just been assigned.
+            checkpoint: The grid's trail checkpoint from before the assignment.
+
+        Returns:
+            False if propagation shows no solution is possible, True otherwise.
+        """
+        if self.propagator is None:
+            return True
+        return self.propagator.propagate([node] + self.grid.changed_since(checkpoint))
+
     def forward_check(self):
         """ Checks if, given the current sudoku placements, it is impossible to attain a solution.
 
@@ -101,12 +125,7 @@ class BackTrackingTemplate(object):
             True if a solution is not possible, false otherwise (solution is possible or indeterminable)
         """
 
-        free = self.grid.get_free_tiles()
-        for point in free:
-            if self.grid.value_data[point[0], point[1]].sum() == 0:
-                return True
-
-        return False
+        return self.grid.has_empty_domain()
 
 
     def least_constraining_ordering(self, values, node):
@@ -118,18 +137,9 @@ class BackTrackingTemplate(object):
         Return:
         The list of values, ordered by their constraining factor.
         """
-        x,y = node
-
-        #Get all free variables on the node's row, column and square.
-        free_x, free_y = np.where(self.grid.assignments_data == -1)
-        free_points = [(free_x[i], free_y[i]) for i in range(len(free_x))]
-        affected = list(filter(lambda i: ((i[0] // 3 == x // 3) and (i[-1] // 3 == y // 3)) or (
-                        i[-1] == y) or (i[0] == x), free_points))
-        values_remaining = self.    grid.value_data[list(zip(*affected))]
-
-        # how many squares can put the value in its square
-        values_count = np.sum(values_remaining, axis = 0)[values]
-        values = list(zip(values, values_count))
+        # how many free squares on the node's row, column and square can take each value
+        counts = self.grid.peer_value_counts(node)
+        values = [(v, counts[v]) for v in values]
 
         # sort values by occurences
         values.sort(key= lambda x: x[-1])
@@ -145,34 +155,10 @@ class BackTrackingTemplate(object):
             The variable in the grid which should be traversed next.
         """
         if mrv:
-            # get free variables
-            free_x, free_y = np.where(self.grid.assignments_data == -1)
-
-            # get number of free values
-            values_remaining = np.sum(self.grid.value_data[free_x, free_y], axis=-1)
-
-            # Get minimum
-            minimums = np.where(values_remaining == np.amin(values_remaining))[0]
-
-
-            # tiebreak with most constraining variable
-            if len(minimums) > 1 and mcv:
-                # Most constraining is variable with least number of assigned variables in its row, column and square.
-                free_points = [(free_x[i], free_y[i]) for i in range(len(free_x))]
-                min_point = None
-                min_value = 100
-                for m in minimums:
-                    x, y = free_x[m], free_y[m]
-                    affected = len(list(filter(lambda i: ((i[0] // 3 == x // 3) and (i[-1] // 3 == y // 3)) or (i[-1] == y) or (i[0] == x), free_points)))
-
-                    if affected > 0:
-                        min_value = affected
-                        min_point = (x, y)
-                return min_point
-
-            # Else just return first element
-            else:
-                return (free_x[minimums[0]], free_y[minimums[0]])
+            # Fewest values remaining. The most constraining variable tiebreak counts
+            # the free squares in each tied square's row, column and square, but keeps
+            # the last tied square with any, which is always the last (it counts itself).
+            return self.grid.most_restricted(last=mcv)
 
         # Default, get tiles in order.
         else:
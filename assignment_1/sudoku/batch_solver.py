@@ -0,0 +1,91 @@
+import os
+from datetime import datetime
+from multiprocessing import Pool, cpu_count
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backtracking_template import BackTrackingTemplate
+from iterative_backtracking import IterativeBackTracking
+from data_loader import PACKED_BINARY, PACKED_TEXT, BitboardSudokuGrid, SudokuGrid, read_packed
+from propagation import Propagator
+
+
+def solve_puzzle(task: Tuple[Hashable, Union[str, np.ndarray], bool, bool, bool, bool, bool]) -> Dict[str, object]:
+    """ Solves a single puzzle. Runs inside a worker process.
+
+    Args:
+        task: A tuple of the puzzle's identifier, the puzzle (a file name or a 9x9
+            array of values), and the forward checking, heuristics, bit-board,
+            propagation and iterative options (as for testing.run_sudoku).
+
+    Returns:
+        The puzzle's identifier, nodes assigned, time in seconds, whether it was solved,
+        and its solution as a list of rows (None if the node limit was reached).
+    """
+    puzzle_id, puzzle, forward_check, heuristics, bitboard, propagate, iterative = task
+    start = datetime.now()
+    grid = BitboardSudokuGrid(puzzle) if bitboard else SudokuGrid(puzzle)
+    propagator = Propagator(grid) if propagate else None
+    engine = IterativeBackTracking if iterative else BackTrackingTemplate
+    solution, nodes = engine(grid, forward_check or propagate, heuristics, propagator).run()
+    return {"puzzle": puzzle_id, "nodes": nodes,
+            "time": (datetime.now() - start).total_seconds(),
+            "solved": solution is not None,
+            "solution": solution.tolist() if solution is not None else None}
+
+
+def solve_batch(puzzles: Iterable[Tuple[Hashable, Union[str, np.ndarray]]], forward_check: bool,
+                heuristics: bool, bitboard: bool=False, propagate: bool=False,
+                workers: Optional[int]=None, chunksize: int=4,
+                iterative: bool=False) -> Iterator[Dict[str, object]]:
+    """ Solves many puzzles over a pool of worker processes, yielding each result as
+        soon as it completes, in no particular order.
+
+    Args:
+        puzzles: (identifier, puzzle) pairs, where a puzzle is a file name or a 9x9
+            array of values with 0 for empty squares. May be a generator, which is
+            consumed as the workers need puzzles.
+        forward_check: If True, will use forward checking.
+        heuristics: If True, will use additional heuristics.
+        bitboard: If True, will use the bit-board grid.
+        propagate: If True, will propagate constraints after forward checking.
+        workers: The number of worker processes. Defaults to the number of CPUs.
+        chunksize: The number of puzzles sent to a worker at a time. Larger chunks
+            cost less to send, smaller chunks stream results sooner.
+        iterative: If True, will search with an explicit stack instead of recursion.
+
+    Returns:
+        An iterator of result dictionaries, as returned by solve_puzzle.
+    """
+    tasks = ((puzzle_id, puzzle, forward_check, heuristics, bitboard, propagate, iterative)
+             for puzzle_id, puzzle in puzzles)
+    with Pool(processes=workers or cpu_count()) as p:
+        for result in p.imap_unordered(solve_puzzle, tasks, chunksize=chunksize):
+            yield result
+
+
+def find_puzzles(paths: List[str]) -> Iterator[Tuple[Hashable, Union[str, np.ndarray]]]:
+    """ Finds the Sudoku files given, and those in any directories given. Packed files
+        (see data_loader.read_packed) are streamed puzzle by puzzle.
+
+    Args:
+        paths: Sudoku files, packed files and directories to search.
+
+    Returns:
+        An iterator of (identifier, puzzle) pairs, as taken by solve_batch. Sudoku files
+        are identified by their file name and passed by name, packed puzzles by their
+        packed file name and position, and passed as arrays.
+    """
+    for path in paths:
+        if path.endswith((PACKED_TEXT, PACKED_BINARY)):
+            for i, puzzle in enumerate(read_packed(path)):
+                yield (f"{path}:{i}", np.array(puzzle))
+            continue
+        if not os.path.isdir(path):
+            yield (path, path)
+            continue
+        for root, _, files in sorted(os.walk(path)):
+            for f in sorted(files):
+                if f.endswith(".sd"):
+                    yield (os.path.join(root, f), os.path.join(root, f))
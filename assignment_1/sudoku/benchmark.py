@@ -0,0 +1,130 @@
+import json
+import sys
+import tracemalloc
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backtracking_template import BackTrackingTemplate
+from exact_cover import ExactCoverSudoku
+from testing import get_option, problem_files, run_sudoku
+
+# The solver configurations, as (forward checking, heuristics, propagation). A, B and C
+# are those of `testing.py compare`, P adds constraint propagation to C and X is the
+# exact cover solver.
+CONFIGURATIONS = {"A": (False, False, False), "B": (True, False, False),
+                  "C": (True, True, False), "P": (True, True, True), "X": None}
+
+PERCENTILES = (50, 95, 99)
+
+
+def solve(name: str, filename: str, options: Dict[str, bool]) -> Tuple[Optional[np.ndarray], int]:
+    """ Solves a problem with a configuration.
+
+    Returns:
+        A (solution nodes) tuple, the solution None if it was not solved.
+    """
+    if CONFIGURATIONS[name] is None:
+        return ExactCoverSudoku(filename, max_nodes=BackTrackingTemplate.MAX_NODES).run()
+    forward, heuristics, propagate = CONFIGURATIONS[name]
+    return run_sudoku(filename, forward, heuristics, options["bitboard"], propagate,
+                      options["iterative"])
+
+
+def run_configuration(case: Tuple[str, List[Tuple[Tuple[int, int, str], str]], Dict[str, bool]]
+                      ) -> List[Dict[str, object]]:
+    """ Solves every problem with one configuration, one at a time, in its own worker
+        process.
+
+    Every problem is solved twice: first timed, then again with tracemalloc tracing
+    allocations, to measure its peak memory without the tracing slowing the timed solve.
+
+    Args:
+        case: A tuple of the configuration name, the (key, filename) problems to solve
+            and the grid options (bitboard and iterative, as for testing.run_sudoku).
+
+    Returns:
+        A row of each problem's size, nodes, wall-clock seconds, whether it was solved
+        and the peak memory allocated while solving it in kilobytes.
+    """
+    name, problems, options = case
+    rows = []
+    for (size, _, _), filename in problems:
+        start = datetime.now()
+        solution, nodes = solve(name, filename, options)
+        rows.append({"problem": filename, "size": size, "nodes": nodes,
+                     "time": (datetime.now() - start).total_seconds(),
+                     "solved": solution is not None})
+
+    tracemalloc.start()
+    for row in rows:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        solve(name, row["problem"], options)
+        row["peak_kb"] = (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+    tracemalloc.stop()
+    return rows
+
+
+def summarise(rows: List[Dict[str, object]]) -> Dict[str, object]:
+    """ Summarises a configuration's rows.
+
+    Returns:
+        The number of problems and solved problems, the mean nodes, the latency
+        percentiles and mean in seconds, the nodes per second over all problems and the
+        largest peak memory of a problem in kilobytes.
+    """
+    times = np.array([r["time"] for r in rows])
+    nodes = sum(r["nodes"] for r in rows)
+    summary = {"problems": len(rows), "solved": sum(r["solved"] for r in rows),
+               "mean_nodes": nodes / len(rows), "mean_time": float(times.mean())}
+    for p, latency in zip(PERCENTILES, np.percentile(times, PERCENTILES)):
+        summary[f"p{p}"] = float(latency)
+    summary["nodes_per_sec"] = nodes / times.sum() if times.sum() > 0 else 0.0
+    summary["peak_kb"] = max(r["peak_kb"] for r in rows)
+    return summary
+
+
+def run_benchmark(names: List[str], problems: List[Tuple[Tuple[int, int, str], str]],
+                  options: Dict[str, bool]) -> Dict[str, Dict[str, object]]:
+    """ Runs each configuration in a freshly spawned process, one after another so they
+        do not compete for the CPU.
+
+    Returns:
+        A mapping from configuration name to its summary and rows.
+    """
+    results = {}
+    with get_context("spawn").Pool(processes=1, maxtasksperchild=1) as p:
+        cases = [(name, problems, options) for name in names]
+        for name, rows in zip(names, p.imap(run_configuration, cases)):
+            results[name] = {"summary": summarise(rows), "problems": rows}
+            s = results[name]["summary"]
+            print(f"{name}: Solved {s['solved']}/{s['problems']}. Mean nodes={s['mean_nodes']:.2f}. "
+                  f"p50={s['p50'] * 1000:.2f}ms p95={s['p95'] * 1000:.2f}ms p99={s['p99'] * 1000:.2f}ms. "
+                  f"Nodes/sec={s['nodes_per_sec']:.0f}. Peak memory={s['peak_kb']:.1f}KB.")
+    return results
+
+
+def main():
+    n = int(sys.argv[1])
+    names = get_option("configs", ",".join(CONFIGURATIONS)).split(",")
+    for name in names:
+        if name not in CONFIGURATIONS:
+            raise ValueError(f"Unknown configuration {name}, must be one of {list(CONFIGURATIONS)}.")
+    options = {"bitboard": "--bitboard" in sys.argv, "iterative": "--iterative" in sys.argv}
+
+    problems = sorted(problem_files(n))
+    results = run_benchmark(names, problems, options)
+
+    out = get_option("out", "")
+    if out:
+        with open(out, "w") as f:
+            json.dump({"date": datetime.now().isoformat(), "n": n, "options": options,
+                       "configurations": results}, f, indent=2)
+        print(f"\nWrote results to {out}.")
+
+
+if __name__ == '__main__':
+    main()
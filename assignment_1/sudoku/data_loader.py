@@ -1,23 +1,64 @@
-from typing import List, Tuple
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 import numpy as np
 
+# Squares are indexed 9 * x + y in the bit-board grid.
+BOXES = [(x // 3) * 3 + y // 3 for x in range(9) for y in range(9)]
+PEERS = [tuple(j for j in range(81) if j != i and (j // 9 == i // 9 or j % 9 == i % 9 or BOXES[j] == BOXES[i]))
+         for i in range(81)]
+# The peers of each square as an 81x20 array, and each square's neighbourhood (its peers
+# and itself, in row order) as an 81x21 array, for indexing the numpy grid's squares.
+PEER_INDEX = np.array(PEERS)
+NEIGHBOURHOOD_INDEX = np.array([sorted(PEERS[i] + (i,)) for i in range(81)])
+# The squares of each row, column and box (units 0-8, 9-17 and 18-26), and the units
+# each square is in.
+UNITS = ([tuple(9 * x + y for y in range(9)) for x in range(9)] +
+         [tuple(9 * x + y for x in range(9)) for y in range(9)] +
+         [tuple(i for i in range(81) if BOXES[i] == b) for b in range(9)])
+SQUARE_UNITS = [(i // 9, 9 + i % 9, 18 + BOXES[i]) for i in range(81)]
+UNIT_INDEX = np.array(UNITS)
+
+# Extensions of the packed multi-puzzle formats, see read_packed.
+PACKED_TEXT = ".txt"
+PACKED_BINARY = ".npy"
+
+# The size and values of each 9-bit domain, bit v set if the value v is possible.
+ALL_VALUES = (1 << 9) - 1
+DOMAIN_SIZE = [bin(d).count("1") for d in range(ALL_VALUES + 1)]
+DOMAIN_VALUES = [[v for v in range(9) if d >> v & 1] for d in range(ALL_VALUES + 1)]
+
 
 class SudokuGrid(object):
 
     def __init__(self, filename):
+        self.value_data = SudokuGrid.read_values(filename)
+        self.assignments_data = np.copy(self.value_data) -1
+        # Transform to 3D binary where depth has 0,8 one hot if that square can be
+        # that value. 0 -> cannot be that value. If singular value in depth, then
+        # it is a constant.
+        self.value_data = (np.arange(9) == self.value_data[..., None] - 1).astype(int)
+        self.value_data[(self.value_data == 0).all(axis=-1), :] =  np.ones((9,9,9))[(self.value_data == 0).all(axis=-1), :]
+        # Views of the grid with squares indexed 9 * x + y, to index by PEER_INDEX.
+        self.square_values = self.value_data.reshape(81, 9)
+        self.square_assignments = self.assignments_data.reshape(81)
+        # The number of forward checking values of each square, kept up to date by every
+        # change so the most restricted square is found without summing the grid.
+        self.square_sizes = self.square_values.sum(axis=1)
+        # (x, y, value) of each value removed by forward checking, in order of removal.
+        self.trail = []
+        self.nodes_assigned = 0
+        self.load_initial_variable_constraints()
+
+    @staticmethod
+    def read_values(filename: Union[str, np.ndarray]) -> np.ndarray:
+        """ Reads a Sudoku file into a 9x9 array of values in [1,9], 0 for empty squares.
+            Puzzles already in memory can be given as such an array instead of a file.
+        """
+        if isinstance(filename, np.ndarray):
+            return np.array(filename, dtype=int).reshape(9, 9)
         with open(filename, "r") as f:
             rows = f.readlines()
-
-            # rows = rows[:9]
-            self.value_data = np.array([[int(x) for x in row.split(" ")[:-1]] for row in rows[:-1]])
-            self.assignments_data = np.copy(self.value_data) -1
-            # Transform to 3D binary where depth has 0,8 one hot if that square can be
-            # that value. 0 -> cannot be that value. If singular value in depth, then
-            # it is a constant.
-            self.value_data = (np.arange(9) == self.value_data[..., None] - 1).astype(int)
-            self.value_data[(self.value_data == 0).all(axis=-1), :] =  np.ones((9,9,9))[(self.value_data == 0).all(axis=-1), :]
-            self.nodes_assigned = 0
-            self.load_initial_variable_constraints()
+        return np.array([[int(x) for x in row.split(" ")[:-1]] for row in rows[:-1]])
 
     def set_assignment(self, node, value):
         """Sets the value of a node to """
@@ -36,11 +77,13 @@ class SudokuGrid(object):
         n_v = np.zeros(9)
         n_v[value] = 1
         self.value_data[x, y] = n_v
+        self.square_sizes[9 * x + y] = self.square_values[9 * x + y].sum()
 
     def remove_value(self, node, value):
         """Sets the value of a node to """
         x,y = node
         self.value_data[x,y,value] = 0
+        self.square_sizes[9 * x + y] = self.square_values[9 * x + y].sum()
 
 
     def get_values_for_node(self, node: Tuple[int,int])-> List[int]:
@@ -54,22 +97,14 @@ class SudokuGrid(object):
             A list of values that could be assigned to the node.
         """
         x, y = node
+        i = 9 * x + y
 
         # Get values remaining from forward checking.
-        possibilities = list(np.where(self.value_data[x,y,:] == 1)[0])
-
-        # Get co-ordinates of squares already assigned.
-        used_x, used_y = np.where(self.assignments_data != -1)
-        pairs = [(used_x[i], used_y[i]) for i in range(len(used_x))]
-
-        # get square that would constrain the current node.
-        square = list(filter(lambda i: ((i[0] // 3 == x // 3) and (i[-1] // 3 == y // 3)), pairs))
-        rows  = list(filter(lambda i:  (i[-1] == y), pairs))
-        columns = list(filter(lambda i: (i[0] == x), pairs))
-        pairs_ind = list(zip(*rows+columns+square))
+        possibilities = list(np.flatnonzero(self.square_values[i]))
 
-        # Get values from remaining positions
-        existing = self.assignments_data[pairs_ind]
+        # Get values assigned to the squares that would constrain the current node.
+        existing = self.square_assignments[PEER_INDEX[i]]
+        existing = existing[existing != -1]
 
         # remove contradicting values from possibilities
         return list(set(possibilities).difference(set(existing)))
@@ -90,6 +125,64 @@ class SudokuGrid(object):
         return [(free_x[i], free_y[i]) for i in range(len(free_x))]
 
 
+    def has_empty_domain(self)-> bool:
+        """ Returns True if forward checking has left an unassigned square without values.
+        """
+        return bool(((self.square_sizes == 0) & (self.square_assignments == -1)).any())
+
+    def most_restricted(self, last: bool)-> Optional[Tuple[int, int]]:
+        """ Finds the unassigned square with the fewest forward checking values.
+
+        Args:
+            last: If True, break ties by the last square in row order, otherwise by
+                the first.
+
+        Returns:
+            The co-ordinates of the square, None if every square is assigned.
+        """
+        # Assigned squares are ranked after any possible domain size.
+        values_remaining = np.where(self.square_assignments == -1, self.square_sizes, 10)
+        fewest = values_remaining.min()
+        if fewest == 10:
+            return None
+        minimums = np.flatnonzero(values_remaining == fewest)
+        i = int(minimums[-1] if last else minimums[0])
+        return (i // 9, i % 9)
+
+    def peer_value_counts(self, node: Tuple[int, int])-> np.ndarray:
+        """ Counts, for each value, how many unassigned squares sharing a row, column or
+            square with the node (including the node itself) can still be that value.
+        """
+        x, y = node
+        squares = NEIGHBOURHOOD_INDEX[9 * x + y]
+        return self.square_values[squares[self.square_assignments[squares] == -1]].sum(axis=0)
+
+    def hidden_singles(self, unit: int)-> Tuple[Optional[int], List[Tuple[int, Tuple[int, int]]]]:
+        """ Finds the values not yet placed in a unit (see UNITS) which only one
+            unassigned square of the unit can still be.
+
+        Returns:
+            A (missing singles) tuple, where missing is the smallest unplaced value no
+            square of the unit can be (None if there is none), and singles lists
+            (value, node) of each value with a single possible node, in value order.
+        """
+        squares = UNIT_INDEX[unit]
+        assigned = self.square_assignments[squares]
+        free = squares[assigned == -1]
+        values = self.square_values[free]
+        counts = values.sum(axis=0).tolist()
+        # Placed values are skipped.
+        for v in assigned[assigned != -1].tolist():
+            counts[v] = -1
+
+        missing = counts.index(0) if 0 in counts else None
+        singles = []
+        for v in range(9):
+            if counts[v] == 1:
+                j = int(free[values[:, v].argmax()])
+                singles.append((v, (j // 9, j % 9)))
+        return (missing, singles)
+
     def is_complete(self)-> bool:
         """Returns True if the Sudoku is complete.
         """
@@ -112,7 +205,9 @@ class SudokuGrid(object):
             nodes: A list of unassigned nodes.
             value: The value to remove the forward constraint from for each node.
         """
-        self.value_data[list(zip(*[(x,y, value) for x,y in nodes]))] = 1
+        if nodes:
+            self.value_data[tuple(zip(*[(x,y, value) for x,y in nodes]))] = 1
+            self.square_sizes[:] = self.square_values.sum(axis=1)
 
     def add_variable_constraint(self, node:Tuple[int], value:int)-> List[Tuple[int]]:
         """ Adds forward checking constraints to all nodes incident (square, column
@@ -126,19 +221,408 @@ class SudokuGrid(object):
             A list of nodes that have been constrained because of this assignment.
         """
         x, y = node
+        peers = PEER_INDEX[9 * x + y]
+        # Worry about unassigned variables which can still be the value only
+        peers = peers[(self.square_assignments[peers] == -1) & (self.square_values[peers, value] == 1)]
+        self.square_values[peers, value] = 0
+        self.square_sizes[peers] -= 1
+
+        effected = [(int(j) // 9, int(j) % 9) for j in peers]
+        self.trail.extend((i, j, value) for i, j in effected)
+        return effected
+
+    def get_assignment(self, node: Tuple[int, int])-> int:
+        """ Returns the value assigned to a node, -1 if it is unassigned.
+        """
+        x, y = node
+        return int(self.assignments_data[x, y])
+
+    def get_domain(self, node: Tuple[int, int])-> List[int]:
+        """ Returns the values forward checking has left for a node.
+        """
+        x, y = node
+        return [v for v, possible in enumerate(self.value_data[x, y].tolist()) if possible]
+
+    def prune(self, node: Tuple[int, int], value: int)-> bool:
+        """ Removes a value from a node's forward checking values, recording it on the
+            trail so it is restored by undo.
+
+        Returns:
+            True if the value was removed, False if the node could not be the value.
+        """
+        x, y = node
+        if self.value_data[x, y, value] == 0:
+            return False
+        self.value_data[x, y, value] = 0
+        self.square_sizes[9 * x + y] -= 1
+        self.trail.append((x, y, value))
+        return True
+
+    def changed_since(self, mark: int)-> List[Tuple[int, int]]:
+        """ Returns the nodes which have had values removed since a checkpoint.
+        """
+        return list(dict.fromkeys((x, y) for x, y, _ in self.trail[mark:]))
+
+    def mark(self)-> int:
+        """ Returns a checkpoint of the forward checking trail, which can be undone to.
+        """
+        return len(self.trail)
+
+    def undo(self, mark: int):
+        """ Restores every value removed by forward checking since a checkpoint.
+
+        Args:
+            mark: A checkpoint returned by mark.
+        """
+        removed = self.trail[mark:]
+        del self.trail[mark:]
+        if removed:
+            self.value_data[tuple(zip(*removed))] = 1
+            np.add.at(self.square_sizes, [9 * x + y for x, y, _ in removed], 1)
+
+
+
+class BitboardSudokuGrid(object):
+    """ A Sudoku grid with the interface of SudokuGrid, stored as bit-boards.
+
+    Each square's forward checking values are a 9-bit domain, and each row, column and
+    square keeps a 9-bit mask of the values assigned in it. Finding the values possible
+    for a square, assigning and unassigning are a few integer operations, instead of
+    searching the whole grid.
+
+    Unassigned squares are also indexed in buckets by domain size, updated on every
+    change. Each bucket is an 81-bit mask of its squares, so the first and last square
+    of the smallest non-empty bucket are found in constant time.
+    """
+
+    def __init__(self, filename):
+        values = SudokuGrid.read_values(filename)
+        self.assignments = [-1] * 81
+        self.domains = [ALL_VALUES] * 81
+        self.row_used = [0] * 9
+        self.column_used = [0] * 9
+        self.box_used = [0] * 9
+        self.free_count = 81
+
+        # Bit i of buckets[domain size] is set if square i is unassigned with that many
+        # values.
+        self.buckets = [0] * 10
+        self.buckets[9] = (1 << 81) - 1
+
+        for x, y in zip(*np.where(values > 0)):
+            i, v = 9 * int(x) + int(y), int(values[x, y]) - 1
+            self.place(i, v)
+            self.set_domain(i, 1 << v)
+        # (square index, value bit) of each value removed by forward checking, in order.
+        self.trail = []
+        self.nodes_assigned = 0
+        self.load_initial_variable_constraints()
+
+    def place(self, i: int, value: int):
+        """ Assigns a value to the square with index i, marking it used in its row,
+            column and square.
+        """
+        bit = 1 << value
+        self.assignments[i] = value
+        self.row_used[i // 9] |= bit
+        self.column_used[i % 9] |= bit
+        self.box_used[BOXES[i]] |= bit
+        self.free_count -= 1
+
+        self.buckets[DOMAIN_SIZE[self.domains[i]]] &= ~(1 << i)
+
+    def set_domain(self, i: int, domain: int):
+        """ Sets the domain of the square with index i, moving it between buckets if it
+            is unassigned.
+        """
+        if self.assignments[i] == -1:
+            self.buckets[DOMAIN_SIZE[self.domains[i]]] &= ~(1 << i)
+            self.buckets[DOMAIN_SIZE[domain]] |= 1 << i
+        self.domains[i] = domain
+
+    def set_assignment(self, node, value):
+        """Sets the value of a node to """
+        x, y = node
+        self.place(9 * x + y, value)
+        self.nodes_assigned += 1
+
+    def remove_assignment(self, node):
+        """Sets the value of a node to """
+        x, y = node
+        i = 9 * x + y
+        bit = ~(1 << self.assignments[i])
+        self.assignments[i] = -1
+        self.row_used[x] &= bit
+        self.column_used[y] &= bit
+        self.box_used[BOXES[i]] &= bit
+        self.free_count += 1
+
+        self.buckets[DOMAIN_SIZE[self.domains[i]]] |= 1 << i
+
+    def set_value(self, node, value):
+        """Sets the value of a node to """
+        x, y = node
+        domain = 0
+        for v in np.atleast_1d(value):
+            domain |= 1 << int(v)
+        self.set_domain(9 * x + y, domain)
+
+    def remove_value(self, node, value):
+        """Sets the value of a node to """
+        x, y = node
+        self.set_domain(9 * x + y, self.domains[9 * x + y] & ~(1 << value))
+
+    def get_values_for_node(self, node: Tuple[int,int])-> List[int]:
+        """ For an unassigned square in the sudoku, return all values still possible
+        for assignment.
+
+        Args:
+            node: An x,y co-ordinate of a sudoku square (indexed 0-8)
+
+        Returns:
+            A list of values that could be assigned to the node.
+        """
+        x, y = node
+        i = 9 * x + y
+        used = self.row_used[x] | self.column_used[y] | self.box_used[BOXES[i]]
+
+        # Ordered as a set difference, as in SudokuGrid, so both backends search alike.
+        return list(set(DOMAIN_VALUES[self.domains[i]]).difference(set(DOMAIN_VALUES[used])))
+
+    def get_single_solution(self)-> List[List[int]]:
+        """ Convert solution from [0,8] to [1,9] indexing.
+
+        Returns: A sudoku solution with indexing [1,9].
+        """
+        return np.array(self.assignments).reshape(9, 9) + 1
+
+    def get_free_tiles(self)-> List[Tuple[int, int]]:
+        """ Returns a list of co-ordinates of squares in the Sudoku without an
+            assignment.
+        """
+        return [(i // 9, i % 9) for i in range(81) if self.assignments[i] == -1]
+
+    def has_empty_domain(self)-> bool:
+        """ Returns True if forward checking has left an unassigned square without values.
+        """
+        return self.buckets[0] != 0
+
+    def most_restricted(self, last: bool)-> Optional[Tuple[int, int]]:
+        """ Finds the unassigned square with the fewest forward checking values, from
+            the buckets.
+
+        Args:
+            last: If True, break ties by the last square in row order, otherwise by
+                the first.
+
+        Returns:
+            The co-ordinates of the square, None if every square is assigned.
+        """
+        for squares in self.buckets:
+            if squares:
+                # The highest set bit, or the lowest (isolated by squares & -squares).
+                i = (squares if last else squares & -squares).bit_length() - 1
+                return (i // 9, i % 9)
+        return None
+
+    def peer_value_counts(self, node: Tuple[int, int])-> List[int]:
+        """ Counts, for each value, how many unassigned squares sharing a row, column or
+            square with the node (including the node itself) can still be that value.
+        """
+        x, y = node
+        i = 9 * x + y
+        counts = [0] * 9
+        for j in PEERS[i] + (i,):
+            if self.assignments[j] == -1:
+                for v in DOMAIN_VALUES[self.domains[j]]:
+                    counts[v] += 1
+        return counts
+
+    def hidden_singles(self, unit: int)-> Tuple[Optional[int], List[Tuple[int, Tuple[int, int]]]]:
+        """ Finds the values not yet placed in a unit (see UNITS) which only one
+            unassigned square of the unit can still be, from the domain masks.
+
+        Returns:
+            As for SudokuGrid.hidden_singles.
+        """
+        # Values possible in at least one, and in at least two, unassigned squares.
+        once = twice = placed = 0
+        for j in UNITS[unit]:
+            if self.assignments[j] == -1:
+                twice |= once & self.domains[j]
+                once |= self.domains[j]
+            else:
+                placed |= 1 << self.assignments[j]
+
+        missing = ALL_VALUES & ~(once | placed)
+        singles = []
+        for v in DOMAIN_VALUES[once & ~(twice | placed)]:
+            for j in UNITS[unit]:
+                if self.assignments[j] == -1 and self.domains[j] >> v & 1:
+                    singles.append((v, (j // 9, j % 9)))
+                    break
+        return (DOMAIN_VALUES[missing][0] if missing else None, singles)
+
+    def is_complete(self)-> bool:
+        """Returns True if the Sudoku is complete.
+        """
+        return self.free_count == 0
+
+    ## FORWARD CHECKING FUNCs
+    def load_initial_variable_constraints(self):
+        """ Load forward checking from pre-existing variable-value assignments.
+        """
+        for i in range(81):
+            if self.assignments[i] > -1:
+                self.add_variable_constraint((i // 9, i % 9), self.assignments[i])
+
+    def remove_variable_constraint(self, nodes: List[Tuple[int, int]], value: int):
+        """ Removes the forward checking variable constraint on unassigned nodes.
+
+        Args:
+            nodes: A list of unassigned nodes.
+            value: The value to remove the forward constraint from for each node.
+        """
+        bit = 1 << value
+        for x, y in nodes:
+            self.set_domain(9 * x + y, self.domains[9 * x + y] | bit)
+
+    def add_variable_constraint(self, node:Tuple[int], value:int)-> List[Tuple[int]]:
+        """ Adds forward checking constraints to all nodes incident (square, column
+            and row) by removing their ability to be the value
+
+        Args:
+            node: The node which has been assigned value.
+            value: The value the node has been assigned.
+
+        Returns:
+            A list of nodes that have been constrained because of this assignment.
+        """
+        x, y = node
+        bit = 1 << value
         effected = []
-        effected.extend([(i, y, value) for i in range(9)])
-        effected.extend([(x, i, value) for i in range(9)])
-        x_c, y_c = [(x//3 *3) + i for i in range(3)], [(y//3 *3) + i for i in range(3)]
+        for j in PEERS[9 * x + y]:
+            if self.assignments[j] == -1 and self.domains[j] & bit:
+                self.set_domain(j, self.domains[j] ^ bit)
+                self.trail.append((j, bit))
+                effected.append((j // 9, j % 9))
+        return effected
+
+    def get_assignment(self, node: Tuple[int, int])-> int:
+        """ Returns the value assigned to a node, -1 if it is unassigned.
+        """
+        x, y = node
+        return self.assignments[9 * x + y]
 
-        for i in x_c:
-            for j in y_c:
-                effected.append((i,j, value))
+    def get_domain(self, node: Tuple[int, int])-> List[int]:
+        """ Returns the values forward checking has left for a node.
+        """
+        x, y = node
+        return list(DOMAIN_VALUES[self.domains[9 * x + y]])
 
-        effected.remove((x,y, value))
-        # Worry about unassigned variables only
-        effected = list(filter(lambda i: self.assignments_data[i[0], i[1]] == -1, effected))
+    def prune(self, node: Tuple[int, int], value: int)-> bool:
+        """ Removes a value from a node's forward checking values, recording it on the
+            trail so it is restored by undo.
 
-        effected = list(zip(*effected))
-        self.value_data[effected] = 0
-        return [(x,y) for x,y,z in zip(*effected)]
+        Returns:
+            True if the value was removed, False if the node could not be the value.
+        """
+        x, y = node
+        i, bit = 9 * x + y, 1 << value
+        if not self.domains[i] & bit:
+            return False
+        self.set_domain(i, self.domains[i] ^ bit)
+        self.trail.append((i, bit))
+        return True
+
+    def changed_since(self, mark: int)-> List[Tuple[int, int]]:
+        """ Returns the nodes which have had values removed since a checkpoint.
+        """
+        return list(dict.fromkeys((j // 9, j % 9) for j, _ in self.trail[mark:]))
+
+    def mark(self)-> int:
+        """ Returns a checkpoint of the forward checking trail, which can be undone to.
+        """
+        return len(self.trail)
+
+    def undo(self, mark: int):
+        """ Restores every value removed by forward checking since a checkpoint.
+
+        Args:
+            mark: A checkpoint returned by mark.
+        """
+        trail = self.trail
+        while len(trail) > mark:
+            j, bit = trail.pop()
+            self.set_domain(j, self.domains[j] | bit)
+
+
+def read_packed(filename: str) -> Iterator[np.ndarray]:
+    """ Streams the puzzles of a packed file, each as a 9x9 array of values in [1,9]
+        with 0 for empty squares.
+
+    There are two packed formats. Text files (.txt) have one puzzle per line, its 81
+    squares in row order with 0 or . for empty squares. Binary files (.npy) are a
+    numpy array of shape (puzzles, 81) and type uint8, which is memory-mapped rather
+    than read, so only the puzzles used are loaded.
+
+    Args:
+        filename: The packed file.
+
+    Returns:
+        An iterator of the file's puzzles, in order.
+    """
+    if filename.endswith(PACKED_BINARY):
+        puzzles = np.load(filename, mmap_mode="r")
+        for p in puzzles:
+            yield np.asarray(p).reshape(9, 9)
+        return
+
+    with open(filename, "rb") as f:
+        for line in f:
+            line = line.strip().replace(b".", b"0")
+            if line:
+                yield (np.frombuffer(line, dtype=np.uint8) - ord("0")).reshape(9, 9)
+
+
+def write_packed(filename: str, puzzles: Iterable[np.ndarray]) -> int:
+    """ Writes puzzles to a packed file, in the format given by its extension.
+
+    Args:
+        filename: The packed file, ending .txt or .npy (see read_packed).
+        puzzles: 9x9 arrays of values with 0 for empty squares.
+
+    Returns:
+        The number of puzzles written.
+    """
+    puzzles = np.array([np.asarray(p).reshape(81) for p in puzzles], dtype=np.uint8).reshape(-1, 81)
+    if filename.endswith(PACKED_BINARY):
+        np.save(filename, puzzles)
+    else:
+        with open(filename, "wb") as f:
+            f.writelines(bytes(p + ord("0")) + b"\n" for p in puzzles)
+    return len(puzzles)
+
+
+def pack_problems(folder: str, filename: str) -> int:
+    """ Converts a problems folder, holding a folder of .sd files per size, into a
+        single packed file. Puzzles are ordered by size, then by file number.
+
+    Args:
+        folder: The problems folder, e.g. 'problems'.
+        filename: The packed file to write, ending .txt or .npy.
+
+    Returns:
+        The number of puzzles written.
+    """
+    def number(name: str):
+        stem = os.path.splitext(name)[0]
+        return (0, int(stem), "") if stem.isdigit() else (1, 0, stem)
+
+    files = []
+    for size in sorted(os.listdir(folder), key=number):
+        if os.path.isdir(os.path.join(folder, size)):
+            files.extend(os.path.join(folder, size, f)
+                         for f in sorted(os.listdir(os.path.join(folder, size)), key=number)
+                         if f.endswith(".sd"))
+    return write_packed(filename, (SudokuGrid.read_values(f) for f in files))
@@ -0,0 +1,208 @@
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from backtracking_template import BackTrackingTemplate
+from data_loader import BitboardSudokuGrid, SudokuGrid
+from propagation import Propagator
+
+SOLVED = "solved"
+UNSOLVABLE = "unsolvable"
+LIMIT = "limit"
+PAUSED = "paused"
+
+
+class ChoicePoint(object):
+    """ A square being tried on the search stack, with the values left to try.
+    """
+
+    def __init__(self, node: Tuple[int, int], values: List[int]):
+        self.node = node
+        self.values = values
+        self.tried = 0
+        self.checkpoint = None
+        self.assigned = False
+
+
+class IterativeBackTracking(BackTrackingTemplate):
+    """ Runs the same search as BackTrackingTemplate, in the same order, but keeps its
+        choice points on an explicit stack instead of recursing.
+
+    The search can be stopped after a budget of nodes or seconds, keeping its stack, and
+    resumed later by calling search again. Many searches can so be time-sliced on one
+    process, see interleave.
+    """
+
+    def __init__(self, initial_grid: Union[SudokuGrid, BitboardSudokuGrid],
+                 forward_checking: bool, heuristic: bool,
+                 propagator: Optional[Propagator]=None,
+                 max_nodes: int=BackTrackingTemplate.MAX_NODES):
+        """
+
+        Args:
+            initial_grid: A sudoku grid (of either backend) with initial variables
+                constraints applied.
+            forward_checking: If true, perform forward checking in CSP.
+            heuristic: If True, perform heuristics in CSP.
+            propagator: If given, propagates constraints after every assignment's
+                forward checking. Requires forward checking.
+            max_nodes: The number of assignments after which the search gives up.
+        """
+        super().__init__(initial_grid, forward_checking, heuristic, propagator)
+        self.max_nodes = max_nodes
+        self.stack = None
+        self.status = None
+        self.solution = None
+        self.seconds = 0.0
+        self.backtracks = 0
+        self.max_depth = 0
+
+    def run(self) -> Tuple[List[List[int]], int]:
+        """ Runs the search to completion.
+
+        Returns:
+            A (solution steps) tuple where the solution is a complete Sudoku grid (None
+            if there is none or the node limit was reached) and steps is how many
+            partial/complete assignments it had to take.
+        """
+        self.search()
+        return (self.solution, self.grid.nodes_assigned)
+
+    def search(self, node_budget: Optional[int]=None,
+               time_budget: Optional[float]=None) -> str:
+        """ Starts or resumes the search, until it finishes or a budget is used up.
+
+        Args:
+            node_budget: The number of assignments to make before pausing, None for no
+                limit.
+            time_budget: The number of seconds to search for before pausing, None for
+                no limit.
+
+        Returns:
+            The status of the search: SOLVED, UNSOLVABLE, LIMIT (the node limit was
+            reached) or PAUSED.
+        """
+        if self.status not in (None, PAUSED):
+            return self.status
+        self.status = None
+
+        start = datetime.now()
+        stop_at = None if node_budget is None else self.grid.nodes_assigned + node_budget
+        if self.stack is None:
+            self.start()
+
+        while self.status is None:
+            if stop_at is not None and self.grid.nodes_assigned >= stop_at:
+                self.status = PAUSED
+            elif time_budget is not None and (datetime.now() - start).total_seconds() >= time_budget:
+                self.status = PAUSED
+            else:
+                self.advance()
+
+        self.seconds += (datetime.now() - start).total_seconds()
+        return self.status
+
+    def start(self):
+        """ Sets up the search stack, propagating constraints from the givens first.
+        """
+        self.grid.nodes_assigned = 0
+        self.stack = []
+        if self.propagator is not None and not self.propagator.propagate_all():
+            self.status = UNSOLVABLE
+            return
+        self.enter()
+
+    def enter(self):
+        """ Moves to a new depth of the search, as a call of run_recursive would: checks
+            the node limit and for a solution, then pushes a choice point for the next
+            square.
+        """
+        if self.grid.nodes_assigned > self.max_nodes:
+            self.status = LIMIT
+            return
+
+        if self.grid.is_complete():
+            self.solution = self.grid.get_single_solution()
+            self.status = SOLVED
+            return
+
+        node = self.select_next_variable(mrv=self.heuristic, mcv=self.heuristic)
+        values = self.grid.get_values_for_node(node)
+        if len(values) == 0:
+            self.backtrack()
+            return
+
+        if self.heuristic:
+            values = self.least_constraining_ordering(values, node)
+        self.stack.append(ChoicePoint(node, values))
+        self.max_depth = max(self.max_depth, len(self.stack))
+
+    def advance(self):
+        """ Tries the next value of the choice point on top of the stack, undoing the
+            value tried before it.
+        """
+        choice = self.stack[-1]
+        if choice.assigned:
+            if self.forward:
+                self.grid.undo(choice.checkpoint)
+            self.grid.remove_assignment(choice.node)
+            choice.assigned = False
+
+        if choice.tried == len(choice.values):
+            self.stack.pop()
+            self.backtrack()
+            return
+
+        v = choice.values[choice.tried]
+        choice.tried += 1
+        self.grid.set_assignment(choice.node, v)
+
+        if self.forward:
+            choice.checkpoint = self.grid.mark()
+            self.grid.add_variable_constraint(choice.node, v)
+            if self.forward_check() or not self.propagate(choice.node, choice.checkpoint):
+                self.grid.undo(choice.checkpoint)
+                self.grid.remove_assignment(choice.node)
+                return
+
+        choice.assigned = True
+        self.enter()
+
+    def backtrack(self):
+        """ Returns to the choice point below, or finishes if there is none left.
+        """
+        self.backtracks += 1
+        if not self.stack:
+            self.status = UNSOLVABLE
+
+    def statistics(self) -> Dict[str, object]:
+        """ Returns the progress of the search so far, whether or not it has finished.
+
+        Returns:
+            The status (None if not started), nodes assigned, seconds searched,
+            backtracks, and current and maximum depths of the search stack.
+        """
+        return {"status": self.status, "nodes": self.grid.nodes_assigned,
+                "seconds": self.seconds, "backtracks": self.backtracks,
+                "depth": len(self.stack) if self.stack is not None else 0,
+                "max_depth": self.max_depth}
+
+
+def interleave(searches: List[IterativeBackTracking], node_budget: int=100
+               ) -> Iterator[Tuple[int, str]]:
+    """ Time-slices many searches on one process, giving each a node budget in turn
+        until every search has finished.
+
+    Args:
+        searches: The searches to run.
+        node_budget: The number of assignments each search makes per turn.
+
+    Returns:
+        An iterator of (index in searches, final status) pairs, as searches finish.
+    """
+    running = list(range(len(searches)))
+    while running:
+        for i in list(running):
+            status = searches[i].search(node_budget=node_budget)
+            if status != PAUSED:
+                running.remove(i)
+                yield (i, status)
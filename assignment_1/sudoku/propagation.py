@@ -0,0 +1,113 @@
+from collections import deque
+from typing import Iterable, List, Tuple, Union
+
+from data_loader import PEERS, SQUARE_UNITS, BitboardSudokuGrid, SudokuGrid
+
+
+class Propagator(object):
+    """ Propagates the all-different constraints of a Sudoku after each assignment.
+
+    Runs AC-3 over the binary not-equal constraints between peers. Revising an arc
+    removes a value from a square only when a peer's domain is that single value, so
+    this is naked single elimination. Each unit is also checked for hidden singles, a
+    value only one square of the unit can take, which reduces that square's domain to
+    the value. Squares whose domains change are queued, so work is only done around
+    the latest changes. Every value removed is recorded on the grid's forward checking
+    trail, so backtracking undoes propagation too.
+    """
+
+    def __init__(self, grid: Union[SudokuGrid, BitboardSudokuGrid]):
+        """
+
+        Args:
+            grid: The grid to propagate over. Forward checking must be used, as the
+                propagation works on forward checking domains.
+        """
+        self.grid = grid
+        self.values_pruned = 0
+
+    def propagate(self, changed: Iterable[Tuple[int, int]]) -> bool:
+        """ Propagates constraints outwards from squares which have changed, until no
+            more values can be removed.
+
+        Args:
+            changed: The squares which have been assigned or had values removed.
+
+        Returns:
+            False if a square or unit has been left without a possible value, True
+            otherwise.
+        """
+        queue = deque(changed)
+        queued = set(queue)
+        while queue:
+            square = queue.popleft()
+            queued.discard(square)
+
+            revised = self.revise_peers(square)
+            if revised is None:
+                return False
+            reduced = self.hidden_singles(square)
+            if reduced is None:
+                return False
+
+            for s in revised + reduced:
+                if s not in queued:
+                    queued.add(s)
+                    queue.append(s)
+        return True
+
+    def propagate_all(self) -> bool:
+        """ Propagates constraints over the whole grid, as before the search starts.
+        """
+        return self.propagate(self.grid.get_free_tiles())
+
+    def revise_peers(self, square: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """ Revises the arcs from every peer to a square whose domain is a single value,
+            removing the value from the peers.
+
+        Returns:
+            The peers which lost the value, or None if the square has no values.
+        """
+        if self.grid.get_assignment(square) != -1:
+            return []
+        domain = self.grid.get_domain(square)
+        if len(domain) == 0:
+            return None
+        if len(domain) > 1:
+            return []
+
+        value = domain[0]
+        revised = []
+        x, y = square
+        for j in PEERS[9 * x + y]:
+            peer = (j // 9, j % 9)
+            if self.grid.get_assignment(peer) == -1 and self.grid.prune(peer, value):
+                self.values_pruned += 1
+                revised.append(peer)
+        return revised
+
+    def hidden_singles(self, square: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """ Checks each unit of a square for values that only one square in the unit
+            can take, and reduces that square's domain to the value.
+
+        Returns:
+            The squares whose domains were reduced, or None if a value has nowhere
+            left to go in a unit.
+        """
+        x, y = square
+        reduced = []
+        for unit in SQUARE_UNITS[9 * x + y]:
+            missing, singles = self.grid.hidden_singles(unit)
+            for v, single in singles:
+                # Values are checked in order, stopping at the first with nowhere to go.
+                if missing is not None and v > missing:
+                    break
+                others = [w for w in self.grid.get_domain(single) if w != v]
+                for w in others:
+                    self.grid.prune(single, w)
+                if others:
+                    self.values_pruned += len(others)
+                    reduced.append(single)
+            if missing is not None:
+                return None
+        return reduced
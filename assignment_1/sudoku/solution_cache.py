@@ -0,0 +1,161 @@
+import itertools
+import math
+import shelve
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Puzzles with more equally ranked rows and columns than this many orderings to try are
+# not cached, see canonical_form.
+MAX_CANDIDATES = 4096
+
+# (transposed, row order, column order, digit relabeling) taking a grid to its
+# canonical form.
+Transform = Tuple[bool, List[int], List[int], np.ndarray]
+
+
+def tied_orders(keys: List[Tuple]) -> List[List[int]]:
+    """ Lists the orders of items which sort their keys in decreasing order, trying
+        every order of items with equal keys. Items with empty keys (a count of 0
+        givens) are interchangeable, so keep their order.
+    """
+    groups = [[i for i in range(len(keys)) if keys[i] == k]
+              for k in sorted(set(keys), reverse=True)]
+    choices = [[list(g)] if k[0] == 0 else [list(p) for p in itertools.permutations(g)]
+               for g, k in zip(groups, sorted(set(keys), reverse=True))]
+    return [sum(c, []) for c in itertools.product(*choices)]
+
+
+def line_orders(grid: np.ndarray, box: int) -> List[List[int]]:
+    """ Lists the row orders of a grid to try when canonicalizing, moving whole bands
+        and rows within bands, ranked by their givens.
+
+    A row's key is its number of givens and the sorted numbers of givens in each of its
+    boxes, and a band's key its number of givens and the sorted keys of its rows. Both
+    are unchanged by relabeling digits and reordering columns, so equivalent grids rank
+    their rows alike.
+    """
+    filled = grid > 0
+    row_keys = [(int(filled[r].sum()),) + tuple(sorted(filled[r].reshape(box, box).sum(axis=1).tolist()))
+                for r in range(len(grid))]
+    band_keys = [(sum(k[0] for k in row_keys[b * box:(b + 1) * box]),) +
+                 tuple(sorted(row_keys[b * box:(b + 1) * box])) for b in range(box)]
+
+    within = [[[b * box + r for r in order] for order in tied_orders(row_keys[b * box:(b + 1) * box])]
+              for b in range(box)]
+    orders = []
+    for bands in tied_orders(band_keys):
+        for rows in itertools.product(*[within[b] for b in bands]):
+            orders.append(sum(rows, []))
+    return orders
+
+
+def canonical_form(values: np.ndarray) -> Tuple[Optional[str], Optional[Transform]]:
+    """ Finds the canonical form of a Sudoku, the same for every Sudoku reached from it by
+        transposing, reordering bands, stacks, rows within bands and columns within
+        stacks, and relabeling digits.
+
+    Rows and columns are ranked by their givens, and every ordering of equally ranked
+    rows and columns is tried, with digits relabeled by order of first appearance. The
+    smallest resulting grid is the canonical form.
+
+    Args:
+        values: An NxN array of values in [1,N], 0 for empty squares.
+
+    Returns:
+        A (key transform) tuple of the canonical grid as a string and the transform
+        taking the Sudoku to it, or (None, None) if there are more than MAX_CANDIDATES
+        orderings to try.
+    """
+    n = len(values)
+    box = math.isqrt(n)
+    best, best_transform = None, None
+    for transposed in (False, True):
+        grid = values.T if transposed else values
+        row_orders, column_orders = line_orders(grid, box), line_orders(grid.T, box)
+        if len(row_orders) * len(column_orders) > MAX_CANDIDATES:
+            return (None, None)
+
+        for rows, columns in itertools.product(row_orders, column_orders):
+            flat = grid[np.ix_(rows, columns)].ravel()
+            relabel = np.zeros(n + 1, dtype=int)
+            for label, digit in enumerate(dict.fromkeys(flat[flat > 0].tolist()), 1):
+                relabel[digit] = label
+            key = relabel[flat].astype(np.uint8).tobytes()
+            if best is None or key < best:
+                best, best_transform = key, (transposed, rows, columns, relabel)
+
+    # Digits missing from the givens are interchangeable, so label them in order.
+    relabel = best_transform[-1]
+    missing = [d for d in range(1, n + 1) if relabel[d] == 0]
+    relabel[missing] = np.arange(n + 1 - len(missing), n + 1)
+    return (best.hex(), best_transform)
+
+
+def to_canonical(solution: np.ndarray, transform: Transform) -> np.ndarray:
+    """ Applies a transform to a solution.
+    """
+    transposed, rows, columns, relabel = transform
+    grid = solution.T if transposed else solution
+    return relabel[grid[np.ix_(rows, columns)]]
+
+
+def from_canonical(solution: np.ndarray, transform: Transform) -> np.ndarray:
+    """ Reverses a transform applied to a solution.
+    """
+    transposed, rows, columns, relabel = transform
+    inverse = np.zeros(len(relabel), dtype=int)
+    inverse[relabel] = np.arange(len(relabel))
+    grid = np.zeros_like(solution)
+    grid[np.ix_(rows, columns)] = inverse[solution]
+    return grid.T if transposed else grid
+
+
+class SolutionCache(object):
+    """ A persistent on-disk cache of Sudoku solutions, keyed by canonical form.
+
+    A puzzle which is a transposed, reordered or relabeled copy of a solved puzzle is a
+    cache hit, its solution mapped back from the stored canonical solution.
+    """
+
+    def __init__(self, filename: str):
+        """
+
+        Args:
+            filename: The shelve file to keep solutions in, created if missing.
+        """
+        self.shelf = shelve.open(filename)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, values: np.ndarray) -> Optional[np.ndarray]:
+        """ Looks up the solution of a puzzle.
+
+        Args:
+            values: An NxN array of values in [1,N], 0 for empty squares.
+
+        Returns:
+            The solution with values in [1,N], or None if the puzzle is not cached.
+        """
+        key, transform = canonical_form(values)
+        if key is None or key not in self.shelf:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return from_canonical(np.array(self.shelf[key]), transform)
+
+    def store(self, values: np.ndarray, solution: np.ndarray):
+        """ Stores the solution of a puzzle.
+
+        Args:
+            values: An NxN array of values in [1,N], 0 for empty squares.
+            solution: The puzzle's solution, with values in [1,N].
+        """
+        key, transform = canonical_form(values)
+        if key is not None:
+            self.shelf[key] = to_canonical(np.array(solution), transform).tolist()
+
+    def close(self):
+        """ Writes the cache to disk and closes it.
+        """
+        self.shelf.close()
@@ -1,41 +1,101 @@
+import math
 import os
+import random
 import sys
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from data_loader import SudokuGrid
+from data_loader import BitboardSudokuGrid, SudokuGrid, pack_problems
 from backtracking_template import BackTrackingTemplate
+from propagation import Propagator
+from batch_solver import find_puzzles, solve_batch
+from iterative_backtracking import IterativeBackTracking
+from exact_cover import ExactCoverSudoku, random_puzzle
+from solution_cache import SolutionCache
 
 
-def run_sudoku(filename: str, forward_check: bool, heuristics: bool):
+def get_option(name: str, default: Optional[str]) -> Optional[str]:
+    """ Gets the value of a `--name=value` command line option.
+
+    Args:
+        name: The name of the option, without leading dashes.
+        default: The value to use if the option was not given.
+    """
+    for arg in sys.argv:
+        if arg.startswith(f"--{name}="):
+            return arg.split("=", 1)[1]
+    return default
+
+def problem_files(n: int) -> List[Tuple[Tuple[int, int, str], str]]:
+    """ Lists the problem files of sizes 1->n, keyed by (size, position, file name) in
+        the order they appear in each folder.
+    """
+    return [((i, j, file), f"problems/{i}/{file}") for i in range(1, n + 1)
+            for j, file in enumerate(os.listdir(f"problems/{i}/"))]
+
+def run_sudoku(filename: str, forward_check: bool, heuristics: bool, bitboard: bool=False,
+               propagate: bool=False, iterative: bool=False,
+               cache: Optional[SolutionCache]=None):
     """ Runs a single sudoku problem.
 
     Args:
-        filename: The name of the sudoku file to use.
+        filename: The name of the sudoku file to use, or a 9x9 array of its values.
         forward_check: If True, will use forward checking in heuristic.
         heuristics: If True, will use additional heuristics
+        bitboard: If True, will use the bit-board grid instead of numpy arrays.
+        propagate: If True, will propagate constraints (AC-3 and hidden singles) after
+            forward checking. Implies forward checking.
+        iterative: If True, will search with an explicit stack instead of recursion.
+        cache: If given, the solution is looked up in the cache before searching, and
+            stored in it after. A cache hit traverses no nodes.
     Returns:
         A tuple consisting of:
             0. The solution to the Sudoku (or None if limit reached).
             1. The number of nodes traversed.
     """
-    grid = SudokuGrid(filename)
-    algorithm = BackTrackingTemplate(grid, forward_check, heuristics)
-    return algorithm.run()
+    if cache is not None:
+        values = SudokuGrid.read_values(filename)
+        solution = cache.lookup(values)
+        if solution is not None:
+            return (solution, 0)
+
+    grid = BitboardSudokuGrid(filename) if bitboard else SudokuGrid(filename)
+    propagator = Propagator(grid) if propagate else None
+    engine = IterativeBackTracking if iterative else BackTrackingTemplate
+    algorithm = engine(grid, forward_check or propagate, heuristics, propagator)
+    solution, nodes = algorithm.run()
+
+    if cache is not None and solution is not None:
+        cache.store(values, solution)
+    return (solution, nodes)
+
+def close_cache(cache: Optional[SolutionCache]):
+    """ Prints the hits and misses of a solution cache, if one was used, and closes it.
+    """
+    if cache is not None:
+        print(f"Cache hits={cache.hits}. Cache misses={cache.misses}.")
+        cache.close()
 
 def main():
     command = sys.argv[1]
     print(f"Command: {command}")
+    bitboard = "--bitboard" in sys.argv
+    propagate = "--propagate" in sys.argv
+    iterative = "--iterative" in sys.argv
+    workers = int(get_option("workers", "0")) or None
+    cache_file = get_option("cache", None)
     if command == "all":
         n = int(sys.argv[2])
 
         forward = "--forward" in sys.argv
         heuristics = "--heuristics" in sys.argv
 
-        results = {}
-        for i in range(1, n+1):
-            results[i] = []
-            for file in os.listdir(f"problems/{i}/"):
-                solution, nodes = run_sudoku(f"problems/{i}/{file}", forward, heuristics)
-                results[i].append(nodes)
+        results = dict((i, []) for i in range(1, n + 1))
+        batch = solve_batch(problem_files(n), forward, heuristics, bitboard, propagate, workers,
+                            iterative=iterative)
+        # Results arrive as they complete, so sort them back into file order.
+        for r in sorted(batch, key=lambda r: r["puzzle"]):
+            results[r["puzzle"][0]].append(r["nodes"])
 
         for size, nodes in results.items():
             print(f"n={size} Average nodes traversed={sum(nodes)/len(nodes)}. Nodes: {nodes}.")
@@ -43,28 +103,25 @@ def main():
     elif command == "compare":
         n = int(sys.argv[2])
 
-        for i in range(1, n + 1):
-            resultsA = []
-            resultsB = []
-            resultsC = []
-
-            for file in os.listdir(f"problems/{i}/"):
-                solutionA, nodesA = run_sudoku(f"problems/{i}/{file}", False, False)
-                solutionB, nodesB = run_sudoku(f"problems/{i}/{file}", True, False)
-                solutionC, nodesC = run_sudoku(f"problems/{i}/{file}", True, True)
-                resultsA.append(nodesA)
-                resultsB.append(nodesB)
-                resultsC.append(nodesC)
+        results = []
+        for forward, heuristics in [(False, False), (True, False), (True, True)]:
+            nodes = dict((i, []) for i in range(1, n + 1))
+            for r in solve_batch(problem_files(n), forward, heuristics, bitboard, workers=workers,
+                                 iterative=iterative):
+                nodes[r["puzzle"][0]].append(r["nodes"])
+            results.append(nodes)
+        resultsA, resultsB, resultsC = results
 
+        for i in range(1, n + 1):
             # print results online
-            print(f"n={i} Average nodes A={sum(resultsA) / len(resultsA)}. Average nodes B={sum(resultsB) / len(resultsB)}. Average nodes C={sum(resultsC) / len(resultsC)}")
+            print(f"n={i} Average nodes A={sum(resultsA[i]) / len(resultsA[i])}. Average nodes B={sum(resultsB[i]) / len(resultsB[i])}. Average nodes C={sum(resultsC[i]) / len(resultsC[i])}")
 
     elif command == "compare_file":
         filename = sys.argv[2]
 
-        solutionA, nodesA = run_sudoku(filename, False, False)
-        solutionB, nodesB = run_sudoku(filename, True, False)
-        solutionC, nodesC = run_sudoku(filename, True, True)
+        solutionA, nodesA = run_sudoku(filename, False, False, bitboard, iterative=iterative)
+        solutionB, nodesB = run_sudoku(filename, True, False, bitboard, iterative=iterative)
+        solutionC, nodesC = run_sudoku(filename, True, True, bitboard, iterative=iterative)
 
         # print results online
         print(f"File: {filename}")
@@ -73,13 +130,77 @@ def main():
         print(f"Nodes C={nodesC}")
 
 
+    elif command == "batch":
+        forward = "--forward" in sys.argv
+        heuristics = "--heuristics" in sys.argv
+        paths = [p for p in sys.argv[2:] if not p.startswith("--")]
+
+        puzzles = find_puzzles(paths)
+        cache = SolutionCache(cache_file) if cache_file else None
+        solved = 0
+        nodes = []
+        if cache is not None:
+            # Only this process uses the cache, so hits are found before solving the rest.
+            pending = dict((puzzle_id, SudokuGrid.read_values(puzzle)) for puzzle_id, puzzle in puzzles)
+            for puzzle_id, values in list(pending.items()):
+                if cache.lookup(values) is not None:
+                    print(f"file: {puzzle_id}. Solved=True. Nodes traversed=0. Cached.")
+                    solved += 1
+                    nodes.append(0)
+                    del pending[puzzle_id]
+            puzzles = list(pending.items())
+
+        for r in solve_batch(puzzles, forward, heuristics, bitboard, propagate, workers,
+                             iterative=iterative):
+            print(f"file: {r['puzzle']}. Solved={r['solved']}. Nodes traversed={r['nodes']}. Time (s)={r['time']}.")
+            solved += r["solved"]
+            nodes.append(r["nodes"])
+            if cache is not None and r["solved"]:
+                cache.store(pending[r["puzzle"]], r["solution"])
+        print(f"Solved {solved}/{len(nodes)}. Average nodes traversed={sum(nodes) / max(len(nodes), 1)}.")
+        close_cache(cache)
+
+    elif command in ("cover", "cover_random"):
+        max_nodes = int(get_option("max-nodes", str(BackTrackingTemplate.MAX_NODES)))
+        if command == "cover":
+            puzzles = find_puzzles([p for p in sys.argv[2:] if not p.startswith("--")])
+        else:
+            size, count = int(sys.argv[2]), int(sys.argv[3])
+            box = math.isqrt(size)
+            if box * box != size:
+                raise ValueError(f"The size of a Sudoku must be a square number, not {size}.")
+            givens = int(get_option("givens", str(size * size * 3 // 5)))
+            rng = random.Random(int(get_option("seed", "0")))
+            puzzles = ((f"random {i}", random_puzzle(box, givens, rng)) for i in range(count))
+
+        solved = 0
+        nodes = []
+        seconds = 0.0
+        for puzzle_id, puzzle in puzzles:
+            start = datetime.now()
+            solution, n = ExactCoverSudoku(puzzle, max_nodes).run()
+            elapsed = (datetime.now() - start).total_seconds()
+            print(f"file: {puzzle_id}. Solved={solution is not None}. Nodes traversed={n}. Time (s)={elapsed}.")
+            solved += solution is not None
+            nodes.append(n)
+            seconds += elapsed
+        print(f"Solved {solved}/{len(nodes)}. Average nodes traversed={sum(nodes) / max(len(nodes), 1)}. Nodes/sec={sum(nodes) / max(seconds, 1e-9)}.")
+
+    elif command == "pack":
+        filename = sys.argv[2]
+        count = pack_problems("problems", filename)
+        print(f"Packed {count} puzzles into {filename}.")
+
     elif command == "run":
         filename = sys.argv[2]
         forward = "--forward" in sys.argv
         heuristics = "--heuristics" in sys.argv
-        solution, nodes = run_sudoku(filename, forward, heuristics)
+        cache = SolutionCache(cache_file) if cache_file else None
+        solution, nodes = run_sudoku(filename, forward, heuristics, bitboard, propagate, iterative,
+                                     cache)
         print(f"file: {filename}. Nodes traversed={nodes}. Solution:")
         print(solution)
+        close_cache(cache)
 
 
 if __name__ == '__main__':
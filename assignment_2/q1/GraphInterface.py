@@ -1,18 +1,34 @@
+import hashlib
+import os
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 from scipy.spatial import distance
 
 class GraphInterface(object):
     """ Provides an abstraction for algorithms to interact with the underlying data.
     """
-    def __init__(self, cities: np.array):
+    def __init__(self, cities: np.array, dist_matrix: Optional[np.array]=None,
+                 neighbours: Optional[np.array]=None):
+        """
+
+        Args:
+            cities: A nx2 array of city co-ordinates.
+            dist_matrix: The precomputed nxn distance matrix, if available.
+            neighbours: The precomputed nxn array of city indices where each row is
+                sorted by increasing distance, if available.
+        """
         self.cities = cities
 
         if cities.ndim != 2 or cities.shape[1] != 2:
             raise ValueError(f"Cities must be a nx2 Numpy array, not {cities.shape}.")
 
         self.n = cities.shape[0]
-        self.dist_matrix = distance.cdist(self.cities, self.cities, "euclidean")
+        if dist_matrix is None:
+            dist_matrix = distance.cdist(self.cities, self.cities, "euclidean")
+        if neighbours is None:
+            neighbours = np.argsort(dist_matrix, axis=1)
+        self.dist_matrix = dist_matrix
+        self.neighbours = neighbours
         self.closest_cities = self.construct_closest_cities()
 
     def construct_closest_cities(self) -> Dict[int, List[int]]:
@@ -23,7 +39,7 @@ class GraphInterface(object):
             A mapping from city indices (int) to an ordered list of city indices
             sorted by increasing order of euclidean distance.
         """
-        return dict([(i, list(np.argsort(self.dist_matrix[i,:]))[1:]) for i in range(self.n)])
+        return dict([(i, list(self.neighbours[i, 1:])) for i in range(self.n)])
 
     def reset(self):
         return None
@@ -75,12 +91,48 @@ class GraphInterface(object):
         return list(set(range(self.problem_size())).difference(set(path)))
 
     @staticmethod
-    def fromFile(filename: str) -> object:
-        with open(filename) as f:
-            data = f.readlines()
-        converted = map(lambda x: (int(x[1]), int(x[2])), map(lambda y: y.split(" "), data[1:]))
+    def fromFile(filename: str, cache_dir: Optional[str]=None) -> object:
+        """ Loads a problem file.
 
-        return GraphInterface(np.array(list(converted)))
+        Args:
+            filename: The problem file, a count line followed by one "<NAME> <X> <Y>"
+                line per city.
+            cache_dir: If given, a directory of .npz files, keyed by a hash of the
+                problem file's contents, holding the co-ordinates, distance matrix and
+                sorted neighbours of previously loaded problems. Problems found in the
+                cache skip parsing and precomputation, others are added to it.
+
+        Returns:
+            The loaded GraphInterface.
+        """
+        with open(filename, "rb") as f:
+            raw = f.read()
+
+        if cache_dir is None:
+            return GraphInterface(GraphInterface.parse_cities(raw))
+
+        cached = os.path.join(cache_dir, f"{hashlib.sha1(raw).hexdigest()}.npz")
+        if os.path.exists(cached):
+            with np.load(cached) as data:
+                return GraphInterface(data["cities"], data["dist_matrix"], data["neighbours"])
+
+        g = GraphInterface(GraphInterface.parse_cities(raw))
+
+        # Write to a temporary file first, as other processes may be loading the same problem.
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = f"{cached}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, cities=g.cities, dist_matrix=g.dist_matrix, neighbours=g.neighbours)
+        os.replace(temporary, cached)
+        return g
+
+    @staticmethod
+    def parse_cities(raw: bytes) -> np.array:
+        """ Parses the contents of a problem file into a nx2 array of co-ordinates.
+        """
+        data = raw.decode().splitlines()
+        converted = map(lambda x: (int(x[1]), int(x[2])), map(lambda y: y.split(" "), data[1:]))
+        return np.array(list(converted))
 
 if __name__ == "__main__":
     print(GraphInterface.fromFile("problems/5/instance_4.txt").cities)
@@ -1,6 +1,4 @@
-from datetime import datetime
-from typing import List, Optional, Tuple
-import heapq
+from typing import List, Tuple
 import random
 import math
 
@@ -15,6 +13,9 @@ class SimulatedAnnealing(object):
     """
     TEMPERATURE_CONSTANT = 50
     STOPPAGE_VALUE = 0.00001
+    # Iterations between recomputing the current cost, discarding the rounding error
+    # accumulated by adding up cost deltas.
+    RESYNC_INTERVAL = 100000
 
     def __init__(self, graph: GraphInterface, temperature=TEMPERATURE_CONSTANT):
         self.graph = graph
@@ -26,7 +27,9 @@ class SimulatedAnnealing(object):
     def reset(self):
         self.state = list(range(self.graph.n))
         random.shuffle(self.state)
-        self.costs = [self.graph.solution_cost(self.state)]
+        # The cost of the current state, kept up to date by each move's cost delta.
+        self.cost = self.graph.solution_cost(self.state)
+        self.costs = [self.cost]
 
     def run(self, max_iterations=100) -> Tuple[List[str], List[float]]:
         """ Runs the A* search
@@ -42,32 +45,41 @@ class SimulatedAnnealing(object):
         """
 
 
+        moves = self.count_moveset(len(self.state))
         for i in range(max_iterations):
-            # Generate Moveset
-            moves = self.generate_moveset(self.state)
+            if moves == 0:
+                return self.finish()
+            if i > 0 and i % SimulatedAnnealing.RESYNC_INTERVAL == 0:
+                self.cost = self.graph.solution_cost(self.state)
 
-            if len(moves) == 0:
-                return (self.state, self.costs)
-
-            # Choose S i randomly from Moveset(S)
-            m = random.choice(moves)
+            # Choose S i randomly from Moveset(S), as the swap of S i and S i+1
+            m = min(random.randrange(moves), len(self.state) - 2)
 
             # Define dV=V(S i )-V(S)
-            v_s = self.graph.solution_cost(self.state)
-            v_m = self.graph.solution_cost(m)
+            v_s = self.cost
+            v_m = v_s + self.swap_delta(self.state, m)
             dV = v_s - v_m
 
             # If dV>0 then S←S i else with probability p, S←S i
             if dV > 0 or (random.random() <= self.generate_p(dV)):
-                self.state = m
+                self.state[m], self.state[m + 1] = self.state[m + 1], self.state[m]
+                self.cost = v_m
                 self.costs.append(v_m)
                 self.decrease_temperature( i/max_iterations)
             else:
                 self.costs.append(v_s)
                 # If downhill descent is minimal, terminate
                 if abs(dV/v_s) < SimulatedAnnealing.STOPPAGE_VALUE:
-                    return (self.state, self.costs)
+                    return self.finish()
+
+        return self.finish()
 
+    def finish(self) -> Tuple[List[int], List[float]]:
+        """ Recomputes the cost of the final state exactly, replacing the last recorded
+            cost, and returns the result of run.
+        """
+        self.cost = self.graph.solution_cost(self.state)
+        self.costs[-1] = self.cost
         return (self.state, self.costs)
 
     def generate_p(self, dV: float) -> float:
@@ -106,23 +118,32 @@ class SimulatedAnnealing(object):
         self.temperature = self.temperature * adjustment
 
 
-    def generate_moveset(self, path: List[int]) -> List[List[int]]:
-        """ Generates all adjacent movesets from the current path.
+    def count_moveset(self, n: int) -> int:
+        """ Counts the moves from a path of n cities. Move i swaps the cities at i and
+            i+1, for i in [0, n-2]. With more than two cities there is one more move,
+            n-1, which swaps the last two cities again (run maps it to n-2), so the last
+            swap is twice as likely.
+        """
+        return n if n > 2 else max(n - 1, 0)
+
+    def swap_delta(self, path: List[int], i: int) -> float:
+        """ Calculates the change in a path's cost from swapping its cities at i and
+            i+1, from the distances of the (at most four) edges changed.
 
         Args:
             path: A complete and valid path.
+            i: The index of the first city to swap, in [0, len(path)-2].
 
         Returns:
-            A list of possible paths, which are considered neighbours of the current path.
+            The cost of the swapped path less the cost of the path.
         """
-        moves = []
-        for i in range(len(path)-1):
-            moves.append(path[:i] + [path[i+1], path[i]] + path[i+2:])
-
-        #Easier to deal with last case separately
-        if len(moves) > 1:
-            moves.append(path[:-2] + [path[-1], path[-2]])
-        return moves
+        n = len(path)
+        # Every order of three or fewer cities is the same cycle.
+        if n <= 3:
+            return 0.0
+        d = self.graph.dist_matrix
+        a, b, c, e = path[i - 1], path[i], path[i + 1], path[(i + 2) % n]
+        return d[a, c] + d[b, e] - d[a, b] - d[c, e]
 
     def to_letters(self, path):
         """ Converts a path in index form to alphabetical form.
@@ -1,7 +1,7 @@
 import os
 import sys
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from multiprocessing import Pool
 
 
@@ -18,18 +18,32 @@ def int_just(x: float, size: int) -> str:
     return str(x).ljust(size)
 
 
-def run_problem_size(n: int, print_individual: bool = True) -> List[
-    Tuple[float, float]]:
+def get_option(name: str, default: Optional[str]) -> Optional[str]:
+    """ Gets the value of a `--name=value` command line option.
+
+    Args:
+        name: The name of the option, without leading dashes.
+        default: The value to use if the option was not given.
+    """
+    for arg in sys.argv:
+        if arg.startswith(f"--{name}="):
+            return arg.split("=", 1)[1]
+    return default
+
+
+def run_problem_size(n: int, print_individual: bool = True,
+                     cache_dir: Optional[str] = None) -> List[Tuple[float, float]]:
     """ Runs all problems for a single problem size.
 
     Args:
         n: The size of problems to consider
+        cache_dir: The directory of cached problems to load from, if any.
     """
     times = []
     nodes = []
 
     for f in os.listdir(f"problems/{n}/"):
-        g = GraphInterface.fromFile(f"problems/{n}/{f}")
+        g = GraphInterface.fromFile(f"problems/{n}/{f}", cache_dir)
         a = SimulatedAnnealing(g)
         start = datetime.now()
         path, costs = a.run(max_iterations=10000)
@@ -41,24 +55,26 @@ def run_problem_size(n: int, print_individual: bool = True) -> List[
 
 
 def run_tour_size(data):
-    tour_size, problems_folder, t, iterations = data
+    tour_size, problems_folder, t, iterations, cache_dir = data
     problem_no_data = []
     for problem_no in range(3, 8):
         for attempt in range(3):
             costs = run_annealing(
                 f"{problems_folder}/{tour_size}/instance_{problem_no}.txt", t,
-                iterations)
+                iterations, cache_dir)
             problem_no_data.append((costs[-1], costs[0]))
 
     return sum([p[0] for p in problem_no_data]) / 15, sum([p[-1] for p in problem_no_data]) / 15
 
 def temperature_schedule_test(problems_folder: str,
-                              temperature_constants: List[float]) -> None:
+                              temperature_constants: List[float],
+                              cache_dir: Optional[str] = None) -> None:
     """ Performs tests on the temperature schedule for a variety of tour sizes.
 
     Args:
         problems_folder: The path to the problem folder.
         temperature_constants: A list of temperature constants to experiment with.
+        cache_dir: The directory of cached problems to load from, if any.
     """
     PROCESSES = 5
     iterations = 100000
@@ -67,7 +83,7 @@ def temperature_schedule_test(problems_folder: str,
         tour_size_data = {}
         p = Pool(processes = PROCESSES)
         sizes = list(range(5,15))
-        results = p.map(run_tour_size, [(i, problems_folder, t, iterations, ) for i in sizes])
+        results = p.map(run_tour_size, [(i, problems_folder, t, iterations, cache_dir) for i in sizes])
         for size, r in zip(sizes, results):
             tour_size_data[size] = r
 
@@ -76,18 +92,19 @@ def temperature_schedule_test(problems_folder: str,
     for t, c in zip(temperature_data, temperature_constants):
         print(c, t)
 
-def run_annealing(problem_path: str, temperature: float, iterations: int) -> List[
-    float]:
+def run_annealing(problem_path: str, temperature: float, iterations: int,
+                  cache_dir: Optional[str] = None) -> List[float]:
     """
 
     Args:
         problem_path:
         temperature
+        cache_dir: The directory of cached problems to load from, if any.
 
     Returns:
         A list detailing the costs at each iteration.
     """
-    g = GraphInterface.fromFile(problem_path)
+    g = GraphInterface.fromFile(problem_path, cache_dir)
     a = SimulatedAnnealing(g, temperature=temperature)
     path, costs = a.run(max_iterations=iterations)
     return costs
@@ -111,12 +128,13 @@ def run_large_problem(temperature: float, iterations: int) -> None:
     print(f"Max cost was {max(costs)}| Min cost was {min(costs)}.")
 
 def main():
+    cache_dir = get_option("cache", None)
     try:
         n = int(sys.argv[1])
 
     # Run Single File
     except ValueError:
-        g = GraphInterface.fromFile(sys.argv[1])
+        g = GraphInterface.fromFile(sys.argv[1], cache_dir)
         a = SimulatedAnnealing(g)
         start = datetime.now()
         paths, costs = a.run(max_iterations=100)
@@ -130,7 +148,8 @@ def main():
         if len(sys.argv) >= 3 and sys.argv[2] == "all":
             results = []
             for i in range(1, n + 1):
-                a, b = run_problem_size(i, print_individual=False)
+                a, b = run_problem_size(i, print_individual=False,
+                                        cache_dir=cache_dir)
                 results.append((a, b))
 
             for t, i in zip(results, range(1, n + 1)):
@@ -139,7 +158,7 @@ def main():
 
         # Run all files for problems of size argv[1]
         else:
-            a, b = run_problem_size(n)
+            a, b = run_problem_size(n, cache_dir=cache_dir)
             print(
                 f"\nFor {n} cities. \nAverage Time: {a} \nAverage Cost: {b}.")
 